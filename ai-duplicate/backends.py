@@ -0,0 +1,258 @@
+"""
+Inference backends for the two ai-duplicate models.
+
+`torch` runs the original PyTorch models. `onnx` serves the same models through
+onnxruntime from files written by export_onnx.py, int8-quantized by default.
+Both expose the same two calls:
+
+    embedder.encode(texts)                       -> (n, dim) float32, L2-normalized
+    nli.entailment_logits(premises, hypotheses)  -> (n,) float32
+"""
+import json
+import threading
+from typing import List, Optional
+import numpy as np
+import os
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", 'all-MiniLM-L6-v2')
+# Returned with every embedding and stored next to it (reports.embedding_model);
+# vectors from different versions must never be compared
+EMBEDDING_MODEL_VERSION = os.getenv("EMBEDDING_MODEL_VERSION", EMBEDDING_MODEL)
+CLASSIFIER_MODEL = "typeform/distilbert-base-uncased-mnli"
+
+CATEGORIES = ["pothole", "garbage", "street_light", "graffiti", "flooding", "noise_complaint", "broken_infrastructure", "other"]
+SEVERITY_LABELS = ["critical", "high", "medium", "low"]
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")  # torch | onnx
+# Models saved by download_models.py are loaded from here; others come from the hub
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+# Never touch the network: missing local models fail instead of downloading
+MODEL_OFFLINE = os.getenv("MODEL_OFFLINE", "false").lower() == "true"
+if MODEL_OFFLINE:
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_models")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
+
+# Intra-op threads per worker process; 0 splits the available CPUs across WORKERS
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", 0))
+WORKERS = int(os.getenv("WORKERS", 1))
+
+EMBEDDING_SUBDIR = "embedding"
+CLASSIFIER_SUBDIR = "classifier"
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def inference_threads(workers: int = WORKERS) -> int:
+    if INFERENCE_THREADS > 0:
+        return INFERENCE_THREADS
+    return max(1, available_cpus() // max(1, workers))
+
+_threads: Optional[int] = None
+
+def configure_threads(workers: int = WORKERS) -> int:
+    """
+    Size torch's intra-op pool (and later ONNX sessions) for this worker, and
+    pin inter-op parallelism to one thread, as the ONNX sessions do.
+    Call in each worker after fork; thread pools do not survive fork.
+    """
+    global _threads
+    _threads = inference_threads(workers)
+    try:
+        import torch
+    except ImportError:
+        return _threads
+    torch.set_num_threads(_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError as e:
+        # Only allowed before this process first runs inter-op parallel work
+        print(f"Warning: could not set torch inter-op threads: {e}")
+    return _threads
+
+# The embedding and NLI batchers run in executor threads. With each forward
+# pass already using the worker's full thread budget, letting two overlap only
+# oversubscribes the cores, so one runs at a time.
+inference_lock = threading.Lock()
+
+def local_model_path(model_name: str, model_dir: Optional[str] = None) -> str:
+    return os.path.join(model_dir or MODEL_DIR, model_name.replace("/", "--"))
+
+def resolve_model(model_name: str):
+    """(path or hub name, "local" | "hub")"""
+    path = local_model_path(model_name)
+    if os.path.isdir(path):
+        return path, "local"
+    return model_name, "hub"
+
+def entailment_index(label2id: dict) -> int:
+    """Position of the entailment logit, found the same way the zero-shot pipeline does."""
+    for label, index in label2id.items():
+        if label.lower().startswith("entail"):
+            return int(index)
+    return -1
+
+class TorchEmbedder:
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        path, self.source = resolve_model(model_name)
+        self.model = SentenceTransformer(path, device="cpu")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        with inference_lock:
+            return self.model.encode(texts, batch_size=max(1, len(texts)), convert_to_numpy=True)
+
+class TorchNLI:
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        path, self.source = resolve_model(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.model = AutoModelForSequenceClassification.from_pretrained(path)
+        self.model.eval()
+        self.entailment_id = entailment_index(self.model.config.label2id)
+
+    def entailment_logits(self, premises: List[str], hypotheses: List[str]) -> np.ndarray:
+        import torch
+        inputs = self.tokenizer(premises, hypotheses, return_tensors="pt", padding=True, truncation="only_first")
+        with inference_lock, torch.no_grad():
+            logits = self.model(**inputs).logits
+        return logits[:, self.entailment_id].numpy()
+
+def _onnx_session(path: str):
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = _threads or inference_threads()
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+class _LazySession:
+    """
+    Creates the onnxruntime session on first use. Sessions own thread pools,
+    which do not survive fork, so with a preloading server each worker builds
+    its own; the int8 models are small enough that this costs little memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._session = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = _onnx_session(self.path)
+        return self._session
+
+def onnx_model_path(model_dir: str, quantized: bool) -> str:
+    return os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+
+def _feed(session, encoded) -> dict:
+    names = {i.name for i in session.get_inputs()}
+    return {name: np.asarray(value, dtype=np.int64) for name, value in encoded.items() if name in names}
+
+class OnnxEmbedder:
+    name = "onnx"
+    source = "local"
+
+    def __init__(self, model_dir: str, quantized: bool = ONNX_QUANTIZED):
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        with open(os.path.join(model_dir, "export.json")) as f:
+            self.max_seq_length = json.load(f)["max_seq_length"]
+        self.session = _LazySession(onnx_model_path(model_dir, quantized))
+        self.name = "onnx-int8" if quantized else "onnx"
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        session = self.session.get()
+        with inference_lock:
+            hidden = session.run(None, _feed(session, encoded))[0]
+        # Mean pooling over real tokens, then L2 normalization, as the sentence-transformers pipeline does
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+class OnnxNLI:
+    name = "onnx"
+    source = "local"
+
+    def __init__(self, model_dir: str, quantized: bool = ONNX_QUANTIZED):
+        from transformers import AutoConfig, AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.entailment_id = entailment_index(AutoConfig.from_pretrained(model_dir).label2id)
+        self.session = _LazySession(onnx_model_path(model_dir, quantized))
+        self.name = "onnx-int8" if quantized else "onnx"
+
+    def entailment_logits(self, premises: List[str], hypotheses: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            premises, hypotheses, padding=True, truncation="only_first", return_tensors="np"
+        )
+        session = self.session.get()
+        with inference_lock:
+            logits = session.run(None, _feed(session, encoded))[0]
+        return logits[:, self.entailment_id]
+
+def load_embedder(backend: str = INFERENCE_BACKEND, quantized: bool = ONNX_QUANTIZED,
+                  model_dir: str = ONNX_MODEL_DIR):
+    if backend == "onnx":
+        return OnnxEmbedder(os.path.join(model_dir, EMBEDDING_SUBDIR), quantized)
+    return TorchEmbedder(EMBEDDING_MODEL)
+
+def load_nli(backend: str = INFERENCE_BACKEND, quantized: bool = ONNX_QUANTIZED,
+             model_dir: str = ONNX_MODEL_DIR):
+    if backend == "onnx":
+        return OnnxNLI(os.path.join(model_dir, CLASSIFIER_SUBDIR), quantized)
+    return TorchNLI(CLASSIFIER_MODEL)
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max())
+    return e / e.sum()
+
+def zero_shot_scores(nli, texts: List[str], label_sets: List[List[str]]) -> List[List[dict]]:
+    """
+    Score several candidate label sets against each text in a single forward pass.
+    Equivalent to calling the zero-shot pipeline once per (text, label set), but
+    the premise/hypothesis pairs for every text and label are tokenized and run
+    as one batch.
+    """
+    labels = [label for label_set in label_sets for label in label_set]
+    hypotheses = [f"This example is {label}." for label in labels]
+
+    entail_logits = nli.entailment_logits(
+        [text for text in texts for _ in hypotheses],
+        hypotheses * len(texts),
+    ).reshape(len(texts), len(labels))
+
+    results = []
+    for row in entail_logits:
+        text_results = []
+        offset = 0
+        for label_set in label_sets:
+            # Softmax over the entailment logits of each set, as the pipeline does
+            scores = _softmax(row[offset:offset + len(label_set)]).tolist()
+            offset += len(label_set)
+            ranked = sorted(zip(label_set, scores), key=lambda x: x[1], reverse=True)
+            text_results.append({label: float(score) for label, score in ranked})
+        results.append(text_results)
+    return results
@@ -0,0 +1,103 @@
+import asyncio
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    """
+    Collects single-item requests for up to `max_wait_ms` (or until
+    `max_batch_size` items are queued) and runs them through `fn` as one batch.
+
+    `fn` receives a list of items and must return a list of results in the same
+    order. It runs in a worker thread so the event loop keeps accepting requests
+    while the model is busy.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, name: str = "batch"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+
+    def start(self):
+        if self._task is None:
+            self.queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Callers that gave up (client disconnect) don't need a forward pass
+        return [(item, future) for item, future in batch if not future.cancelled()]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.fn, items)
+            except Exception as e:
+                self.errors += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            # How full batches are on average relative to max_batch_size
+            "fill_ratio": self.items / (self.batches * self.max_batch_size) if self.batches else 0.0,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+        }
@@ -0,0 +1,66 @@
+"""
+Latency and throughput of the embedding and zero-shot models per inference
+backend and batch size, run directly against the models (no HTTP).
+
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --backends torch onnx-int8 --batch-sizes 1 8 32 --rounds 20
+
+Backends: torch, onnx (fp32), onnx-int8. The ONNX ones need export_onnx.py first.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import CATEGORIES, SEVERITY_LABELS, ONNX_MODEL_DIR, load_embedder, load_nli, zero_shot_scores  # noqa: E402
+from parity_check import SAMPLE_TEXTS  # noqa: E402
+
+def load(backend: str, model_dir: str):
+    if backend == "torch":
+        return load_embedder("torch"), load_nli("torch")
+    quantized = backend == "onnx-int8"
+    return (
+        load_embedder("onnx", quantized=quantized, model_dir=model_dir),
+        load_nli("onnx", quantized=quantized, model_dir=model_dir),
+    )
+
+def measure(fn, texts, rounds: int) -> dict:
+    fn(texts)  # warm-up
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn(texts)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "texts_per_s": len(texts) * rounds / sum(timings),
+    }
+
+def main(args):
+    print(f"{'backend':<10} {'model':<9} {'batch':>5} {'p50 ms':>9} {'p95 ms':>9} {'texts/s':>9}")
+    for backend in args.backends:
+        embedder, nli = load(backend, args.model_dir)
+        tasks = {
+            "embed": embedder.encode,
+            "classify": lambda texts: zero_shot_scores(nli, texts, [CATEGORIES, SEVERITY_LABELS]),
+        }
+        for task, fn in tasks.items():
+            for batch_size in args.batch_sizes:
+                texts = (SAMPLE_TEXTS * (batch_size // len(SAMPLE_TEXTS) + 1))[:batch_size]
+                r = measure(fn, texts, args.rounds)
+                print(f"{backend:<10} {task:<9} {batch_size:>5} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                      f"{r['texts_per_s']:>9.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"],
+                        choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    main(parser.parse_args())
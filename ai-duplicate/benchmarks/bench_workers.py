@@ -0,0 +1,128 @@
+"""
+Resident memory and /embed throughput of the service versus worker count,
+with and without loading the models before fork.
+
+For each (workers, preload) pair this starts gunicorn with gunicorn.conf.py,
+waits for /ready, drives --concurrency clients for --seconds with unique texts
+(so the result cache never answers), then reads memory from /proc:
+
+  RSS  sum over master and workers; counts shared pages once per process
+  PSS  proportional set size; shared pages are split between processes,
+       so this is the real footprint and where preloading shows up
+
+Linux only. Run from ai-duplicate/:
+
+    python benchmarks/bench_workers.py --workers 1 2 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+import httpx
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def process_tree(pid: int) -> list:
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        children = []
+    for child in children:
+        pids.extend(process_tree(child))
+    return pids
+
+def memory_mb(pid: int) -> dict:
+    rss = pss = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Rss:"):
+                        rss += int(line.split()[1])
+                    elif line.startswith("Pss:"):
+                        pss += int(line.split()[1])
+        except OSError:
+            pass
+    return {"rss_mb": rss / 1024, "pss_mb": pss / 1024}
+
+async def wait_ready(url: str, workers: int, timeout: float = 600):
+    """Every worker must answer /ready; poll until a run of successes covers them all."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                ok = (await client.get(f"{url}/ready", timeout=5)).status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            streak = streak + 1 if ok else 0
+            if streak >= workers * 5:
+                return
+            await asyncio.sleep(0.2 if ok else 1)
+    raise TimeoutError("service never became ready")
+
+async def load(url: str, concurrency: int, seconds: float) -> dict:
+    latencies = []
+    deadline = time.monotonic() + seconds
+
+    async def client_loop(client):
+        while time.monotonic() < deadline:
+            text = f"Pothole near {uuid.uuid4().hex[:8]} on Main Street, cars swerving to avoid it"
+            started = time.perf_counter()
+            response = await client.post(f"{url}/embed", json={"text": text}, timeout=60)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency)) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "req_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+    }
+
+def run(workers: int, preload: bool, args) -> dict:
+    env = dict(os.environ, WORKERS=str(workers), PRELOAD=str(preload).lower(), PORT=str(args.port))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "service:app"],
+        cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(url, workers))
+        idle = memory_mb(server.pid)
+        result = asyncio.run(load(url, args.concurrency, args.seconds))
+        result.update({f"idle_{k}": v for k, v in idle.items()})
+        result.update(memory_mb(server.pid))
+        return result
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main(args):
+    print(f"{args.concurrency} concurrent clients, {args.seconds:.0f}s per run, {os.cpu_count()} CPUs\n")
+    print(f"{'workers':>7} {'preload':>7} {'idle PSS MB':>11} {'PSS MB':>8} {'RSS MB':>8} "
+          f"{'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for workers in args.workers:
+        for preload in (True, False):
+            r = run(workers, preload, args)
+            print(f"{workers:>7} {str(preload):>7} {r['idle_pss_mb']:>11.0f} {r['pss_mb']:>8.0f} {r['rss_mb']:>8.0f} "
+                  f"{r['req_per_s']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--port", type=int, default=9101)
+    main(parser.parse_args())
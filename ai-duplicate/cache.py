@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def normalize_text(text: str) -> str:
+    # Both models are uncased, so case and whitespace don't change their output
+    return " ".join(text.lower().split())
+
+
+def cache_key(kind: str, text: str, model_version: str) -> str:
+    raw = f"{model_version}\0{kind}\0{normalize_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """In-process LRU with a size bound and per-entry TTL."""
+
+    def __init__(self, max_items: int = 10000, ttl_seconds: float = 86400):
+        self.max_items = max_items
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    On-disk tier shared by every worker on the host and kept across restarts.
+    Values are stored as JSON; WAL mode lets readers run alongside a writer.
+
+    SQLite connections must not be used across fork, and under gunicorn
+    preload this object is created in the master. So each process opens its
+    own connection on first use.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 86400, max_items: int = 0):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_items = max_items  # 0 = bounded by the TTL only
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Connections inherited from a parent; closing them in the child is unsafe too
+        self._inherited = []
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            if self._conn is not None:
+                self._inherited.append(self._conn)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl),
+            )
+            conn.commit()
+
+    def purge(self) -> int:
+        """Delete expired entries, then the soonest-expiring ones beyond max_items. Returns rows deleted."""
+        with self._lock:
+            conn = self._connection()
+            deleted = conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),)).rowcount
+            if self.max_items > 0:
+                excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_items
+                if excess > 0:
+                    deleted += conn.execute(
+                        "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)",
+                        (excess,),
+                    ).rowcount
+            conn.commit()
+            return deleted
+
+
+class InferenceCache:
+    """
+    Memory tier in front of an optional disk tier, with hit/miss counters.
+    Disk calls run in a worker thread: they can wait up to the SQLite busy
+    timeout on another worker's write and must not block the event loop.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.purged = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        if self.disk is not None:
+            try:
+                value = await asyncio.to_thread(self.disk.get, key)
+            except sqlite3.Error as e:
+                print(f"Disk cache read failed: {e}")
+                value = None
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, value)
+            except sqlite3.Error as e:
+                print(f"Disk cache write failed: {e}")
+
+    async def purge(self):
+        if self.disk is not None:
+            try:
+                self.purged += await asyncio.to_thread(self.disk.purge)
+            except sqlite3.Error as e:
+                print(f"Disk cache purge failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_items": len(self.memory),
+            "memory_max_items": self.memory.max_items,
+            "disk_enabled": self.disk is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "disk_purged": self.purged,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,25 @@
+"""
+Save both models into $MODEL_DIR so the service can start with
+MODEL_OFFLINE=true and no hub access. Run at image build time, or once
+into a volume mounted at MODEL_DIR.
+
+    python download_models.py
+"""
+import argparse
+from sentence_transformers import SentenceTransformer
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from backends import EMBEDDING_MODEL, CLASSIFIER_MODEL, MODEL_DIR, local_model_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args()
+
+    path = local_model_path(EMBEDDING_MODEL, args.model_dir)
+    SentenceTransformer(EMBEDDING_MODEL, device="cpu").save(path)
+    print(f"Saved {EMBEDDING_MODEL} to {path}")
+
+    path = local_model_path(CLASSIFIER_MODEL, args.model_dir)
+    AutoTokenizer.from_pretrained(CLASSIFIER_MODEL).save_pretrained(path)
+    AutoModelForSequenceClassification.from_pretrained(CLASSIFIER_MODEL).save_pretrained(path)
+    print(f"Saved {CLASSIFIER_MODEL} to {path}")
@@ -0,0 +1,148 @@
+"""
+Category and severity from the MiniLM embedding the service already computes.
+
+Each label set is scored either by a linear softmax head trained on historical
+reports (train_head.py), or, when no head is available, by cosine similarity
+to label prototypes: the mean embedding of a few descriptive phrases per label.
+"""
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import os
+
+CLASSIFIER_HEAD_PATH = os.getenv("CLASSIFIER_HEAD_PATH", "classifier_head.npz")
+PROTOTYPES_PATH = os.getenv("PROTOTYPES_PATH")  # optional JSON {label_set: {label: [phrases]}}
+# Softmax temperature for prototype cosine similarities; lower is more decisive
+PROTOTYPE_TEMPERATURE = float(os.getenv("PROTOTYPE_TEMPERATURE", 0.05))
+
+LABEL_PROTOTYPES: Dict[str, Dict[str, List[str]]] = {
+    "category": {
+        "pothole": ["pothole in the road", "large hole in the asphalt", "damaged road surface full of holes"],
+        "garbage": ["garbage has not been collected", "overflowing trash bins", "illegal dumping of waste"],
+        "street_light": ["street light not working", "broken lamp post", "street lights are out at night"],
+        "graffiti": ["graffiti sprayed on a wall", "vandalism with spray paint", "tagging on public property"],
+        "flooding": ["flooded street after rain", "blocked drain causing flooding", "burst water pipe flooding the road"],
+        "noise_complaint": ["loud noise late at night", "loud music from a bar", "construction noise early in the morning"],
+        "broken_infrastructure": ["broken sidewalk", "damaged bridge railing", "broken traffic signal", "fallen tree blocking the road"],
+        "other": ["general complaint about city services", "other civic issue"],
+    },
+    "severity": {
+        "critical": ["immediate danger to life", "exposed live electric wire", "serious accident hazard right now"],
+        "high": ["serious hazard that needs urgent repair", "dangerous for cars and pedestrians"],
+        "medium": ["problem that should be fixed soon", "ongoing nuisance for residents"],
+        "low": ["minor cosmetic issue", "small inconvenience, not urgent"],
+    },
+}
+
+def softmax_rows(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    e = np.exp(logits)
+    return e / e.sum(axis=-1, keepdims=True)
+
+def ranked(labels: List[str], probs: np.ndarray) -> dict:
+    order = np.argsort(-probs)
+    return {labels[i]: float(probs[i]) for i in order}
+
+class LinearHead:
+    def __init__(self, labels: List[str], weights: np.ndarray, bias: np.ndarray):
+        self.labels = labels
+        self.weights = weights
+        self.bias = bias
+
+    def probs(self, embeddings: np.ndarray) -> np.ndarray:
+        return softmax_rows(embeddings @ self.weights + self.bias)
+
+class PrototypeHead:
+    def __init__(self, labels: List[str], prototypes: np.ndarray, temperature: float = PROTOTYPE_TEMPERATURE):
+        self.labels = labels
+        self.prototypes = prototypes
+        self.temperature = temperature
+
+    def probs(self, embeddings: np.ndarray) -> np.ndarray:
+        return softmax_rows((embeddings @ self.prototypes.T) / self.temperature)
+
+def build_prototypes(encode: Callable[[List[str]], np.ndarray], phrases: Dict[str, List[str]]) -> PrototypeHead:
+    labels = list(phrases)
+    rows = []
+    for label in labels:
+        mean = encode(phrases[label]).mean(axis=0)
+        rows.append(mean / np.linalg.norm(mean))
+    return PrototypeHead(labels, np.stack(rows))
+
+def save_heads(path: str, heads: Dict[str, LinearHead], model_version: str, dim: int):
+    """Heads only fit embeddings of the model they were trained on, so record it."""
+    arrays = {"model": np.array(model_version), "dim": np.array(dim)}
+    for name, head in heads.items():
+        arrays[f"{name}_weights"] = head.weights
+        arrays[f"{name}_bias"] = head.bias
+        arrays[f"{name}_labels"] = np.array(head.labels)
+    np.savez(path, **arrays)
+
+def load_heads(path: str) -> Tuple[Dict[str, LinearHead], Optional[str]]:
+    """Heads in the file and the embedding model version they were trained on (None if unrecorded)."""
+    if not path or not os.path.exists(path):
+        return {}, None
+    data = np.load(path)
+    names = {key[:-len("_weights")] for key in data.files if key.endswith("_weights")}
+    heads = {
+        name: LinearHead([str(l) for l in data[f"{name}_labels"]], data[f"{name}_weights"], data[f"{name}_bias"])
+        for name in names
+    }
+    return heads, str(data["model"]) if "model" in data.files else None
+
+def train_linear_head(embeddings: np.ndarray, targets: List[str], labels: List[str],
+                      epochs: int = 300, lr: float = 0.5, l2: float = 1e-4) -> LinearHead:
+    """Multinomial logistic regression with full-batch gradient descent."""
+    index = {label: i for i, label in enumerate(labels)}
+    y = np.zeros((len(targets), len(labels)), dtype=np.float32)
+    y[np.arange(len(targets)), [index[t] for t in targets]] = 1.0
+    # Inverse-frequency weights so rare labels are not ignored
+    counts = y.sum(axis=0)
+    sample_weights = (len(targets) / (len(labels) * np.clip(counts, 1, None)))[y.argmax(axis=1)][:, None]
+
+    weights = np.zeros((embeddings.shape[1], len(labels)), dtype=np.float32)
+    bias = np.zeros(len(labels), dtype=np.float32)
+    for _ in range(epochs):
+        grad = (softmax_rows(embeddings @ weights + bias) - y) * sample_weights / len(targets)
+        weights -= lr * (embeddings.T @ grad + l2 * weights)
+        bias -= lr * grad.sum(axis=0)
+    return LinearHead(labels, weights, bias)
+
+class EmbeddingClassifier:
+    """Scores label sets from one embedding; a trained head wins over prototypes."""
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], label_sets: Dict[str, List[str]],
+                 model_version: Optional[str] = None,
+                 head_path: Optional[str] = CLASSIFIER_HEAD_PATH, prototypes_path: Optional[str] = PROTOTYPES_PATH):
+        phrases = LABEL_PROTOTYPES
+        if prototypes_path:
+            with open(prototypes_path) as f:
+                phrases = json.load(f)
+        trained, trained_model = load_heads(head_path)
+        if trained:
+            # A head from another embedding model would fail (or, at the same size, mislabel) on every call
+            dim = encode(["dimension check"]).shape[1]
+            mismatched = [name for name, head in trained.items() if head.weights.shape[0] != dim]
+            if mismatched or (model_version and trained_model and trained_model != model_version):
+                print(f"Warning: {head_path} was trained on {trained_model or 'an unknown model'} "
+                      f"({next(iter(trained.values())).weights.shape[0]} dims), not {model_version} ({dim} dims); "
+                      f"using prototypes until train_head.py is rerun")
+                trained = {}
+            elif trained_model is None:
+                print(f"Warning: {head_path} does not record its embedding model; rerun train_head.py to add it")
+
+        self.heads = {}
+        self.sources = {}
+        for name, labels in label_sets.items():
+            if name in trained:
+                self.heads[name] = trained[name]
+                self.sources[name] = "linear_head"
+            else:
+                self.heads[name] = build_prototypes(
+                    encode, {label: phrases[name].get(label, [label.replace("_", " ")]) for label in labels}
+                )
+                self.sources[name] = "prototypes"
+
+    def scores(self, embedding: np.ndarray) -> Dict[str, dict]:
+        embedding = np.asarray(embedding, dtype=np.float32)[None, :]
+        return {name: ranked(head.labels, head.probs(embedding)[0]) for name, head in self.heads.items()}
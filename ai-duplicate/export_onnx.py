@@ -0,0 +1,99 @@
+"""
+Export the embedding and NLI models to ONNX and write int8 dynamic-quantized
+copies next to them, for INFERENCE_BACKEND=onnx.
+
+    python export_onnx.py                   # writes $ONNX_MODEL_DIR (default onnx_models/)
+    python export_onnx.py --skip-parity
+
+Each model gets model.onnx, model.int8.onnx, its tokenizer/config files and
+export.json. A parity check against the torch models runs at the end.
+"""
+import argparse
+import json
+import os
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from sentence_transformers import SentenceTransformer
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+from backends import (
+    EMBEDDING_MODEL, CLASSIFIER_MODEL, ONNX_MODEL_DIR, EMBEDDING_SUBDIR, CLASSIFIER_SUBDIR, onnx_model_path
+)
+
+OPSET = 14
+
+class _TokenEmbeddings(torch.nn.Module):
+    """Transformer body only; pooling and normalization happen in numpy at serve time."""
+
+    def __init__(self, transformer):
+        super().__init__()
+        self.transformer = transformer
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.transformer(
+            input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+        ).last_hidden_state
+
+class _Logits(torch.nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def _export(module, sample: dict, input_names, output_name: str, out_dir: str):
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch"}
+    path = onnx_model_path(out_dir, quantized=False)
+    torch.onnx.export(
+        module,
+        tuple(sample[name] for name in input_names),
+        path,
+        input_names=list(input_names),
+        output_names=[output_name],
+        dynamic_axes=dynamic_axes,
+        opset_version=OPSET,
+    )
+    quantize_dynamic(path, onnx_model_path(out_dir, quantized=True), weight_type=QuantType.QInt8)
+    return path
+
+def export_embedding(out_dir: str):
+    os.makedirs(out_dir, exist_ok=True)
+    model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    sample = tokenizer(["a pothole on main street"], return_tensors="pt", padding=True)
+
+    with torch.no_grad():
+        _export(_TokenEmbeddings(transformer), sample,
+                ("input_ids", "attention_mask", "token_type_ids"), "last_hidden_state", out_dir)
+    tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, "export.json"), "w") as f:
+        json.dump({"model": EMBEDDING_MODEL, "max_seq_length": model.max_seq_length, "opset": OPSET}, f)
+
+def export_classifier(out_dir: str):
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(CLASSIFIER_MODEL)
+    model = AutoModelForSequenceClassification.from_pretrained(CLASSIFIER_MODEL).eval()
+    sample = tokenizer(["a pothole on main street"], ["This example is pothole."], return_tensors="pt")
+
+    with torch.no_grad():
+        _export(_Logits(model), sample, ("input_ids", "attention_mask"), "logits", out_dir)
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, "export.json"), "w") as f:
+        json.dump({"model": CLASSIFIER_MODEL, "opset": OPSET}, f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=ONNX_MODEL_DIR)
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args()
+
+    export_embedding(os.path.join(args.out, EMBEDDING_SUBDIR))
+    export_classifier(os.path.join(args.out, CLASSIFIER_SUBDIR))
+    print(f"Exported to {args.out}")
+
+    if not args.skip_parity:
+        import parity_check
+        raise SystemExit(parity_check.main(["--model-dir", args.out]))
@@ -0,0 +1,24 @@
+"""
+Multi-worker serving with shared model weights:
+
+    WORKERS=4 gunicorn -c gunicorn.conf.py service:app
+
+preload_app imports service.py (and so loads both models) once in the master
+before forking, so workers share the weight pages copy-on-write instead of
+each holding its own copy. Each worker sizes its inference thread pool to
+its share of the CPUs at startup (see backends.configure_threads).
+"""
+import gc
+import os
+
+workers = int(os.getenv("WORKERS", 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', 9001)}"
+preload_app = os.getenv("PRELOAD", "true").lower() == "true"
+# Model warm-up happens after the worker starts; don't kill slow starters
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the GC's reach, so collections in
+    # the workers don't write to (and un-share) the preloaded objects' pages
+    gc.freeze()
@@ -0,0 +1,98 @@
+"""
+Compare the ONNX backends (fp32 and int8) against the torch models.
+
+Reports per-text cosine similarity between embeddings and top-1 agreement of
+the zero-shot category and severity labels. Exits non-zero when int8 falls
+below --min-cosine or --min-agreement.
+
+    python parity_check.py
+    python parity_check.py --texts reports.txt   # one report per line
+"""
+import argparse
+import sys
+from typing import List, Optional
+import numpy as np
+from backends import (
+    CATEGORIES, SEVERITY_LABELS, ONNX_MODEL_DIR, load_embedder, load_nli, zero_shot_scores
+)
+
+SAMPLE_TEXTS = [
+    "Huge pothole on Main Street near the bus stop, cars swerving to avoid it",
+    "Garbage has not been collected for two weeks on Elm Road, bins overflowing",
+    "Street light outside 42 Park Avenue is flickering and goes off at night",
+    "Someone sprayed graffiti all over the wall of the community center",
+    "Basement flooding after the storm, water coming up through the drain",
+    "Loud music from the bar on 5th street every night until 3am",
+    "The railing on the pedestrian bridge is broken and hanging loose",
+    "Fallen tree blocking the bike lane on River Drive",
+    "Live electric wire hanging low over the school entrance, very dangerous",
+    "Manhole cover missing at the junction of Oak and Pine",
+    "Overflowing dumpster attracting rats behind the market",
+    "Traffic signal stuck on red at the Central Square intersection",
+    "Water main burst, street is flooded and water pressure is gone",
+    "Cracked sidewalk slab, an elderly man tripped and fell",
+    "Construction noise starting at 5am on weekends",
+    "Paint tagging on the new bus shelter",
+]
+
+def _top(scores: dict) -> str:
+    return next(iter(scores))
+
+def compare(texts: List[str], reference_embedder, reference_nli, embedder, nli) -> dict:
+    ref_emb = reference_embedder.encode(texts)
+    emb = embedder.encode(texts)
+    cosines = (ref_emb * emb).sum(axis=1) / (
+        np.linalg.norm(ref_emb, axis=1) * np.linalg.norm(emb, axis=1)
+    )
+
+    ref_scores = zero_shot_scores(reference_nli, texts, [CATEGORIES, SEVERITY_LABELS])
+    scores = zero_shot_scores(nli, texts, [CATEGORIES, SEVERITY_LABELS])
+    category_agree = [_top(a[0]) == _top(b[0]) for a, b in zip(ref_scores, scores)]
+    severity_agree = [_top(a[1]) == _top(b[1]) for a, b in zip(ref_scores, scores)]
+    max_prob_diff = max(
+        abs(a[i][label] - b[i][label]) for a, b in zip(ref_scores, scores) for i in (0, 1) for label in a[i]
+    )
+
+    return {
+        "cosine_mean": float(cosines.mean()),
+        "cosine_min": float(cosines.min()),
+        "category_agreement": sum(category_agree) / len(texts),
+        "severity_agreement": sum(severity_agree) / len(texts),
+        "max_prob_diff": float(max_prob_diff),
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--texts", help="File with one report text per line")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    args = parser.parse_args(argv)
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    reference_embedder = load_embedder("torch")
+    reference_nli = load_nli("torch")
+
+    ok = True
+    print(f"{len(texts)} texts, reference: torch\n")
+    print(f"{'backend':<10} {'cos mean':>9} {'cos min':>9} {'category':>9} {'severity':>9} {'max dP':>8}")
+    for quantized in (False, True):
+        embedder = load_embedder("onnx", quantized=quantized, model_dir=args.model_dir)
+        nli = load_nli("onnx", quantized=quantized, model_dir=args.model_dir)
+        r = compare(texts, reference_embedder, reference_nli, embedder, nli)
+        print(f"{embedder.name:<10} {r['cosine_mean']:>9.4f} {r['cosine_min']:>9.4f} "
+              f"{r['category_agreement']:>9.2%} {r['severity_agreement']:>9.2%} {r['max_prob_diff']:>8.3f}")
+        if quantized:
+            ok = (r["cosine_min"] >= args.min_cosine
+                  and r["category_agreement"] >= args.min_agreement
+                  and r["severity_agreement"] >= args.min_agreement)
+
+    print("\nPASS" if ok else "\nFAIL: int8 outputs drift past the thresholds")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
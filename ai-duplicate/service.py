@@ -1,29 +1,101 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List
-from sentence_transformers import SentenceTransformer, util
-from transformers import pipeline
-import torch
+from typing import List, Optional
+import os
+import asyncio
+import time
+from batching import MicroBatcher
+from cache import InferenceCache, LRUCache, SQLiteCache, cache_key
+from backends import (
+    EMBEDDING_MODEL_VERSION, CLASSIFIER_MODEL, CATEGORIES, SEVERITY_LABELS,
+    load_embedder, load_nli, zero_shot_scores, configure_threads,
+)
+from embedding_classifier import EmbeddingClassifier
+
+_process_started = time.perf_counter()
 
 app = FastAPI(title="AI Duplicate Detection Service")
 
-# Load models at startup
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# Per-model load and warm-up seconds, reported by /ready
+startup_timings = {}
+
+def timed_load(name: str, load):
+    started = time.perf_counter()
+    loaded = load()
+    startup_timings[name] = {
+        "backend": getattr(loaded, "name", None),
+        "source": getattr(loaded, "source", None),
+        "load_s": time.perf_counter() - started,
+    }
+    return loaded
+
+# Load models at import; INFERENCE_BACKEND=onnx serves the exported int8 models.
+# MODEL_DIR/MODEL_OFFLINE load them from disk without contacting the hub.
+# Under gunicorn --preload (gunicorn.conf.py) this happens once in the master
+# and workers share the weights copy-on-write, so nothing here may run inference.
+model = timed_load("embedding", load_embedder)
 
 # Zero-shot classifier for category prediction (no training needed!)
 try:
-    category_classifier = pipeline("zero-shot-classification", model="typeform/distilbert-base-uncased-mnli")
-    CATEGORIES = ["pothole", "garbage", "street_light", "graffiti", "flooding", "noise_complaint", "broken_infrastructure", "other"]
+    category_classifier = timed_load("classifier", load_nli)
 except Exception as e:
     print(f"Warning: Could not load category classifier: {e}")
     category_classifier = None
-    CATEGORIES = []
+
+# embedding: score labels from the MiniLM embedding (one forward pass per report),
+# falling back to zero-shot NLI when the top label is below EMBEDDING_MIN_CONFIDENCE.
+# zero_shot: always use NLI.
+CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "embedding")
+EMBEDDING_MIN_CONFIDENCE = float(os.getenv("EMBEDDING_MIN_CONFIDENCE", 0.35))
+
+# Built per worker at startup: prototype embeddings need a forward pass
+embedding_classifier = None
+
+classifier_counts = {"embedding": 0, "zero_shot": 0, "fallback": 0}
+
+# Micro-batching: concurrent requests are grouped into one forward pass
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 32))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", 5))
+
+# Results cache keyed by normalized-text hash and model version.
+# Set CACHE_DB_PATH to share a warm on-disk tier across workers and restarts.
+CACHE_MAX_ITEMS = int(os.getenv("CACHE_MAX_ITEMS", 10000))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 86400))
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH")
+CACHE_DB_MAX_ITEMS = int(os.getenv("CACHE_DB_MAX_ITEMS", 200000))
+# Expired and excess disk entries are deleted this often
+CACHE_PURGE_SECONDS = float(os.getenv("CACHE_PURGE_SECONDS", 600))
+CACHE_VERSION = os.getenv("CACHE_VERSION", "1")
+
+inference_cache = InferenceCache(
+    LRUCache(CACHE_MAX_ITEMS, CACHE_TTL_SECONDS),
+    SQLiteCache(CACHE_DB_PATH, CACHE_TTL_SECONDS, CACHE_DB_MAX_ITEMS) if CACHE_DB_PATH else None,
+)
+_purge_task: Optional[asyncio.Task] = None
+
+async def purge_disk_cache():
+    while True:
+        await inference_cache.purge()
+        await asyncio.sleep(CACHE_PURGE_SECONDS)
 
 class EmbedRequest(BaseModel):
     text: str
 
 class EmbedResponse(BaseModel):
     embedding: List[float]
+    model: str
+
+# Bulk re-embedding (backend/reembed_reports.py) sends whole batches at once
+EMBED_BATCH_MAX_TEXTS = int(os.getenv("EMBED_BATCH_MAX_TEXTS", 1024))
+
+class EmbedBatchRequest(BaseModel):
+    texts: List[str]
+
+class EmbedBatchResponse(BaseModel):
+    embeddings: List[List[float]]
+    model: str
+    dim: int
 
 class Candidate(BaseModel):
     id: int
@@ -45,24 +117,40 @@ def root():
     return {"message": "ai-duplicate service is running"}
 
 @app.post("/embed", response_model=EmbedResponse)
-def embed(request: EmbedRequest):
-    embedding = model.encode(request.text)
-    return {"embedding": embedding.tolist()}
+async def embed(request: EmbedRequest):
+    embedding = await get_embedding(request.text)
+    return {"embedding": embedding, "model": EMBEDDING_MODEL_VERSION}
+
+@app.post("/embed_batch", response_model=EmbedBatchResponse)
+async def embed_batch(request: EmbedBatchRequest):
+    """
+    Embeddings for a large batch. Bypasses the micro-batcher and the result
+    cache, which would only be churned by a one-off bulk job.
+
+    Encodes BATCH_MAX_SIZE texts per forward pass and releases the inference
+    lock between passes, so live /embed and /analyze batches wait for at most
+    one chunk instead of the whole request.
+    """
+    if len(request.texts) > EMBED_BATCH_MAX_TEXTS:
+        raise HTTPException(status_code=413, detail=f"At most {EMBED_BATCH_MAX_TEXTS} texts per request")
+    embeddings = []
+    for start in range(0, len(request.texts), BATCH_MAX_SIZE):
+        chunk = request.texts[start:start + BATCH_MAX_SIZE]
+        embeddings.extend((await asyncio.to_thread(model.encode, chunk)).tolist())
+    dim = len(embeddings[0]) if embeddings else 0
+    return {"embeddings": embeddings, "model": EMBEDDING_MODEL_VERSION, "dim": dim}
 
 @app.post("/check_duplicates", response_model=DuplicateCheckResponse)
 def check_duplicates(request: DuplicateCheckRequest):
     if not request.candidates:
         return {"matches": []}
 
-    # Encode new report
-    new_embedding = model.encode(request.new_report_text, convert_to_tensor=True)
-    
-    # Encode candidates
+    # Encode new report and candidates together; embeddings are L2-normalized
     candidate_texts = [c.text for c in request.candidates]
-    candidate_embeddings = model.encode(candidate_texts, convert_to_tensor=True)
-    
+    embeddings = model.encode([request.new_report_text] + candidate_texts)
+
     # Compute cosine similarity
-    cosine_scores = util.cos_sim(new_embedding, candidate_embeddings)[0]
+    cosine_scores = embeddings[1:] @ embeddings[0]
     
     matches = []
     for i, score in enumerate(cosine_scores):
@@ -84,17 +172,18 @@ class CategoryResponse(BaseModel):
     all_scores: dict
 
 @app.post("/predict_category", response_model=CategoryResponse)
-def predict_category(request: CategoryRequest):
-    if not category_classifier:
+async def predict_category(request: CategoryRequest):
+    if not category_classifier and not embedding_classifier:
         raise HTTPException(status_code=503, detail="Category classifier not available")
     
-    result = category_classifier(request.text, candidate_labels=CATEGORIES)
+    category_scores, _ = await classify(request.text)
+    category, confidence = next(iter(category_scores.items()))
     
     # Return top prediction
     return {
-        "category": result['labels'][0],
-        "confidence": float(result['scores'][0]),
-        "all_scores": {label: float(score) for label, score in zip(result['labels'], result['scores'])}
+        "category": category,
+        "confidence": confidence,
+        "all_scores": category_scores
     }
 
 class SeverityRequest(BaseModel):
@@ -105,15 +194,198 @@ class SeverityResponse(BaseModel):
     confidence: float
 
 @app.post("/predict_severity", response_model=SeverityResponse)
-def predict_severity(request: SeverityRequest):
-    if not category_classifier:
+async def predict_severity(request: SeverityRequest):
+    if not category_classifier and not embedding_classifier:
         # Fallback if model not loaded
         return {"severity": "medium", "confidence": 0.0}
     
-    severity_labels = ["critical", "high", "medium", "low"]
-    result = category_classifier(request.text, candidate_labels=severity_labels)
+    _, severity_scores = await classify(request.text)
+    severity, confidence = next(iter(severity_scores.items()))
     
     return {
-        "severity": result['labels'][0],
-        "confidence": float(result['scores'][0])
+        "severity": severity,
+        "confidence": confidence
+    }
+
+def _encode_batch(texts: List[str]) -> list:
+    return list(model.encode(texts))
+
+def _classify_batch(texts: List[str]) -> List[List[dict]]:
+    return zero_shot_scores(category_classifier, texts, [CATEGORIES, SEVERITY_LABELS])
+
+embed_batcher = MicroBatcher(_encode_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="embed")
+classify_batcher = MicroBatcher(_classify_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="classify")
+
+# Run every model once per batch size before reporting ready, so lazy kernel
+# and allocator initialization doesn't land on the first real requests
+WARMUP = os.getenv("WARMUP", "true").lower() == "true"
+WARMUP_BATCH_SIZES = [int(n) for n in os.getenv("WARMUP_BATCH_SIZES", "1,8").split(",")]
+WARMUP_TEXT = "Large pothole on Main Street near the bus stop, cars swerving to avoid it"
+
+ready = False
+_warmup_task: Optional[asyncio.Task] = None
+
+def _warm_up():
+    steps = [("embedding", model.encode)]
+    if category_classifier is not None:
+        steps.append(("classifier", _classify_batch))
+    for name, fn in steps:
+        started = time.perf_counter()
+        for batch_size in WARMUP_BATCH_SIZES:
+            fn([WARMUP_TEXT] * batch_size)
+        startup_timings[name]["warmup_s"] = time.perf_counter() - started
+
+async def warm_up():
+    global ready
+    try:
+        if WARMUP:
+            await asyncio.to_thread(_warm_up)
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        startup_timings["warmup_error"] = str(e)
+        return
+    startup_timings["seconds_to_ready"] = time.perf_counter() - _process_started
+    ready = True
+
+def _load_embedding_classifier():
+    global embedding_classifier
+    if CLASSIFIER_MODE == "embedding":
+        embedding_classifier = timed_load("embedding_classifier", lambda: EmbeddingClassifier(
+            model.encode, {"category": CATEGORIES, "severity": SEVERITY_LABELS}, EMBEDDING_MODEL_VERSION
+        ))
+
+@app.on_event("startup")
+async def start_batchers():
+    global _warmup_task, _purge_task
+    # Thread pools don't survive fork, so size them here, in the worker
+    startup_timings["inference_threads"] = configure_threads()
+    await asyncio.to_thread(_load_embedding_classifier)
+    embed_batcher.start()
+    classify_batcher.start()
+    if inference_cache.disk is not None and CACHE_PURGE_SECONDS > 0:
+        _purge_task = asyncio.create_task(purge_disk_cache())
+    # In the background so liveness (/) answers while models warm up
+    _warmup_task = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def stop_batchers():
+    await embed_batcher.stop()
+    await classify_batcher.stop()
+    if _purge_task is not None:
+        _purge_task.cancel()
+        await asyncio.gather(_purge_task, return_exceptions=True)
+
+@app.get("/ready")
+def readiness():
+    """200 once models are loaded and warmed up, 503 before. `/` is the liveness check."""
+    body = {"ready": ready, "startup": startup_timings}
+    return body if ready else JSONResponse(status_code=503, content=body)
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "backend": {"embedding": model.name, "classifier": category_classifier.name if category_classifier else None},
+        "embedding_model": EMBEDDING_MODEL_VERSION,
+        "batchers": [embed_batcher.stats(), classify_batcher.stats()],
+        "classifier": {
+            "mode": CLASSIFIER_MODE,
+            "sources": embedding_classifier.sources if embedding_classifier else None,
+            "counts": classifier_counts,
+        },
+    }
+
+async def get_embedding(text: str) -> List[float]:
+    key = cache_key("embed", text, f"{EMBEDDING_MODEL_VERSION}:{model.name}:{CACHE_VERSION}")
+    embedding = await inference_cache.get(key)
+    if embedding is None:
+        embedding = (await embed_batcher.submit(text)).tolist()
+        await inference_cache.set(key, embedding)
+    return embedding
+
+async def get_classification(text: str) -> List[dict]:
+    """[category_scores, severity_scores] for one text from zero-shot NLI."""
+    key = cache_key("classify", text, f"{CLASSIFIER_MODEL}:{category_classifier.name}:{CACHE_VERSION}")
+    scores = await inference_cache.get(key)
+    if scores is None:
+        scores = await classify_batcher.submit(text)
+        await inference_cache.set(key, scores)
+    return scores
+
+async def classify(text: str, embedding: Optional[List[float]] = None) -> List[dict]:
+    """[category_scores, severity_scores], from the embedding when possible."""
+    if embedding_classifier is None:
+        classifier_counts["zero_shot"] += 1
+        return await get_classification(text)
+
+    if embedding is None:
+        embedding = await get_embedding(text)
+    scores = embedding_classifier.scores(embedding)
+    category_scores, severity_scores = scores["category"], scores["severity"]
+
+    low_confidence = max(category_scores.values()) < EMBEDDING_MIN_CONFIDENCE or \
+        max(severity_scores.values()) < EMBEDDING_MIN_CONFIDENCE
+    if low_confidence and category_classifier is not None:
+        # One NLI pass covers both label sets; only replace the uncertain one(s)
+        classifier_counts["fallback"] += 1
+        nli_category, nli_severity = await get_classification(text)
+        if max(category_scores.values()) < EMBEDDING_MIN_CONFIDENCE:
+            category_scores = nli_category
+        if max(severity_scores.values()) < EMBEDDING_MIN_CONFIDENCE:
+            severity_scores = nli_severity
+    else:
+        classifier_counts["embedding"] += 1
+    return [category_scores, severity_scores]
+
+@app.get("/cache/stats")
+def cache_stats():
+    return inference_cache.stats()
+
+class AnalyzeRequest(BaseModel):
+    text: str
+
+class AnalyzeResponse(BaseModel):
+    category: Optional[str]
+    category_confidence: float
+    all_scores: dict
+    severity: str
+    severity_confidence: float
+    embedding: List[float]
+    model: str
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+async def analyze(request: AnalyzeRequest):
+    """Category, severity and embedding for one report in a single call."""
+    if not category_classifier and not embedding_classifier:
+        embedding = await get_embedding(request.text)
+        return {
+            "category": None,
+            "category_confidence": 0.0,
+            "all_scores": {},
+            "severity": "medium",
+            "severity_confidence": 0.0,
+            "embedding": embedding,
+            "model": EMBEDDING_MODEL_VERSION,
+        }
+
+    if embedding_classifier is not None:
+        # Labels come from the same embedding, so no second model pass
+        embedding = await get_embedding(request.text)
+        category_scores, severity_scores = await classify(request.text, embedding)
+    else:
+        # Embedding and NLI batches run side by side
+        embedding, (category_scores, severity_scores) = await asyncio.gather(
+            get_embedding(request.text),
+            classify(request.text),
+        )
+    category, category_confidence = next(iter(category_scores.items()))
+    severity, severity_confidence = next(iter(severity_scores.items()))
+
+    return {
+        "category": category,
+        "category_confidence": category_confidence,
+        "all_scores": category_scores,
+        "severity": severity,
+        "severity_confidence": severity_confidence,
+        "embedding": embedding,
+        "model": EMBEDDING_MODEL_VERSION,
     }
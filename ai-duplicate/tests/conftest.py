@@ -0,0 +1,5 @@
+"""Shared setup for the ai-duplicate tests. They cover the pure-Python pieces and load no models."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
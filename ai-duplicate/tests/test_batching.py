@@ -0,0 +1,111 @@
+"""MicroBatcher flushing, cancellation and error handling."""
+import asyncio
+import threading
+import pytest
+from batching import MicroBatcher
+
+def test_flushes_when_batch_is_full():
+    seen = []
+
+    def fn(items):
+        seen.append(list(items))
+        return [item * 2 for item in items]
+
+    async def body():
+        # A deadline this long would fail the test if size didn't trigger the flush
+        batcher = MicroBatcher(fn, max_batch_size=4, max_wait_ms=60_000)
+        try:
+            return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(4))), 5)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(body()) == [0, 2, 4, 6]
+    assert seen == [[0, 1, 2, 3]]
+
+def test_flushes_partial_batch_at_deadline():
+    seen = []
+
+    def fn(items):
+        seen.append(list(items))
+        return items
+
+    async def body():
+        batcher = MicroBatcher(fn, max_batch_size=32, max_wait_ms=20)
+        try:
+            results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+            return results, batcher.stats()
+        finally:
+            await batcher.stop()
+
+    results, stats = asyncio.run(body())
+    assert results == ["a", "b"]
+    assert seen == [["a", "b"]]
+    assert stats["batches"] == 1 and stats["items"] == 2
+
+def test_skips_cancelled_callers():
+    seen = []
+    first_batch_running = threading.Event()
+    release_first_batch = threading.Event()
+
+    def fn(items):
+        seen.append(list(items))
+        if len(seen) == 1:
+            first_batch_running.set()
+            release_first_batch.wait(5)
+        return items
+
+    async def body():
+        batcher = MicroBatcher(fn, max_batch_size=1, max_wait_ms=0)
+        try:
+            # Hold the worker in the first batch while "gone" is queued and then abandoned
+            busy = asyncio.ensure_future(batcher.submit("busy"))
+            await asyncio.to_thread(first_batch_running.wait, 5)
+            gone = asyncio.ensure_future(batcher.submit("gone"))
+            await asyncio.sleep(0)
+            gone.cancel()
+            kept = asyncio.ensure_future(batcher.submit("kept"))
+            await asyncio.sleep(0)
+            release_first_batch.set()
+            return await busy, await kept
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(body()) == ("busy", "kept")
+    assert seen == [["busy"], ["kept"]]
+
+def test_error_reaches_every_caller_in_the_batch():
+    def fn(items):
+        raise RuntimeError("model failed")
+
+    async def body():
+        batcher = MicroBatcher(fn, max_batch_size=3, max_wait_ms=60_000)
+        try:
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+            return results, batcher.stats()
+        finally:
+            await batcher.stop()
+
+    results, stats = asyncio.run(body())
+    assert [str(r) for r in results] == ["model failed"] * 3
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert stats["errors"] == 1 and stats["batches"] == 0
+
+def test_keeps_serving_after_an_error():
+    calls = {"n": 0}
+
+    def fn(items):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise ValueError("first batch fails")
+        return items
+
+    async def body():
+        batcher = MicroBatcher(fn, max_batch_size=1, max_wait_ms=0)
+        try:
+            with pytest.raises(ValueError):
+                await batcher.submit("x")
+            return await batcher.submit("y")
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(body()) == "y"
@@ -0,0 +1,86 @@
+"""Memory and SQLite result caches and the tiered InferenceCache."""
+import asyncio
+import time
+from cache import InferenceCache, LRUCache, SQLiteCache, cache_key
+
+def test_cache_key_ignores_case_and_whitespace_but_not_model():
+    assert cache_key("embed", "Pothole  on\nMain", "v1") == cache_key("embed", "pothole on main", "v1")
+    assert cache_key("embed", "pothole", "v1") != cache_key("embed", "pothole", "v2")
+    assert cache_key("embed", "pothole", "v1") != cache_key("classify", "pothole", "v1")
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_items=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # b is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+def test_lru_expires_entries():
+    cache = LRUCache(ttl_seconds=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_sqlite_round_trip_and_expiry(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("a", [0.5, 0.25])
+    assert cache.get("a") == [0.5, 0.25]
+    assert cache.get("missing") is None
+
+    expired = SQLiteCache(str(tmp_path / "cache.db"), ttl_seconds=-1)
+    expired.set("b", 1)
+    assert expired.get("b") is None
+
+def test_sqlite_purge_drops_expired_then_excess(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCache(path, ttl_seconds=-1).set("old", 0)
+    cache = SQLiteCache(path, max_items=2)
+    for key in ("k1", "k2", "k3"):
+        cache.set(key, key)
+        time.sleep(0.01)  # distinct expires_at, so k1 expires soonest
+
+    assert cache.purge() == 2
+    assert cache.get("k1") is None
+    assert cache.get("k2") == "k2" and cache.get("k3") == "k3"
+
+def test_sqlite_reopens_connection_in_a_new_process(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("a", 1)
+    parent_conn = cache._conn
+    # As seen from a forked worker
+    monkeypatch.setattr("cache.os.getpid", lambda: -1)
+    assert cache.get("a") == 1
+    assert cache._conn is not parent_conn
+    assert cache._inherited == [parent_conn]
+
+def test_inference_cache_promotes_disk_hits(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.db"))
+    disk.set("k", [1.0])
+    cache = InferenceCache(LRUCache(), disk)
+
+    async def body():
+        first = await cache.get("k")
+        second = await cache.get("k")
+        missing = await cache.get("other")
+        await cache.set("new", [2.0])
+        return first, second, missing
+
+    assert asyncio.run(body()) == ([1.0], [1.0], None)
+    assert disk.get("new") == [2.0]
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+def test_inference_cache_survives_disk_errors(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "missing-dir" / "cache.db"))
+    cache = InferenceCache(LRUCache(), disk)
+
+    async def body():
+        await cache.set("k", 1)  # disk write fails, memory still has it
+        await cache.purge()
+        return await cache.get("k"), await cache.get("other")
+
+    assert asyncio.run(body()) == (1, None)
+    assert cache.stats()["misses"] == 1
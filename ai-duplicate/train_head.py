@@ -0,0 +1,61 @@
+"""
+Train the linear category/severity heads used by CLASSIFIER_MODE=embedding
+from historical reports.
+
+Export labelled reports as JSON lines first, e.g.:
+
+    psql "$DATABASE_URL" -c "\\copy (SELECT json_build_object(
+        'text', title || '. ' || description, 'category', category, 'severity', severity)
+        FROM reports WHERE enrichment_status = 'complete') TO 'reports.jsonl'"
+
+    python train_head.py reports.jsonl            # writes $CLASSIFIER_HEAD_PATH
+
+Rows whose label is not one the service predicts are skipped for that head.
+20% of the rows are held out to report accuracy.
+"""
+import argparse
+import json
+import random
+import numpy as np
+from backends import CATEGORIES, SEVERITY_LABELS, EMBEDDING_MODEL_VERSION, load_embedder
+from embedding_classifier import CLASSIFIER_HEAD_PATH, save_heads, train_linear_head
+
+def main(args):
+    with open(args.input) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    random.Random(0).shuffle(rows)
+    print(f"{len(rows)} reports")
+
+    embedder = load_embedder()
+    texts = [row["text"] for row in rows]
+    embeddings = np.concatenate([
+        embedder.encode(texts[i:i + args.batch_size]) for i in range(0, len(texts), args.batch_size)
+    ]).astype(np.float32)
+
+    heads = {}
+    for name, labels in (("category", CATEGORIES), ("severity", SEVERITY_LABELS)):
+        keep = [i for i, row in enumerate(rows) if row.get(name) in labels]
+        if len(keep) < args.min_rows:
+            print(f"{name}: only {len(keep)} labelled rows, skipped (prototypes stay in use)")
+            continue
+        split = int(len(keep) * 0.8)
+        train, test = keep[:split], keep[split:]
+        head = train_linear_head(embeddings[train], [rows[i][name] for i in train], labels, epochs=args.epochs)
+        predicted = head.probs(embeddings[test]).argmax(axis=1)
+        accuracy = np.mean([labels[p] == rows[i][name] for p, i in zip(predicted, test)]) if test else float("nan")
+        print(f"{name}: trained on {len(train)}, held-out accuracy {accuracy:.2%} on {len(test)}")
+        # Refit on everything for the shipped head
+        heads[name] = train_linear_head(embeddings[keep], [rows[i][name] for i in keep], labels, epochs=args.epochs)
+
+    if heads:
+        save_heads(args.out, heads, EMBEDDING_MODEL_VERSION, embeddings.shape[1])
+        print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("--out", default=CLASSIFIER_HEAD_PATH)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--min-rows", type=int, default=50)
+    main(parser.parse_args())
@@ -1,23 +1,45 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Union
+from datetime import datetime
+import json
 import os
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from summarizer import Summarizer, summary_cache, cache_key, LLM_MODEL
 
 load_dotenv()
 
 app = FastAPI(title="AI LLM Service")
 
 # Initialize OpenAI Client
-# Expects OPENAI_API_KEY in env
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Expects OPENAI_API_KEY in env; OPENAI_BASE_URL points it at another
+# OpenAI-compatible server, e.g. stub_llm.py for offline runs
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL") or None)
+summarizer = Summarizer(client)
+
+class ReportItem(BaseModel):
+    id: int
+    text: str
+    updated_at: Optional[datetime] = None
 
 class SummarizeRequest(BaseModel):
-    reports: List[str]
+    # Plain strings, or items with id/updated_at so repeated requests hit the cache
+    reports: List[Union[ReportItem, str]]
+
+    def texts(self) -> List[str]:
+        return [r.text if isinstance(r, ReportItem) else r for r in self.reports]
+
+    def cache_key(self) -> str:
+        versions = None
+        if all(isinstance(r, ReportItem) for r in self.reports):
+            versions = [(r.id, r.updated_at) for r in self.reports]
+        return cache_key(self.texts(), versions)
 
 class SummarizeResponse(BaseModel):
     summary: str
+    cached: bool = False
 
 class SQLRequest(BaseModel):
     query: str
@@ -30,36 +52,71 @@ def root():
     return {"message": "ai-llm service is running"}
 
 @app.post("/summarize", response_model=SummarizeResponse)
-def summarize(request: SummarizeRequest):
+async def summarize(request: SummarizeRequest):
     if not request.reports:
         return {"summary": "No reports to summarize."}
-    
-    # Combine reports into a single text block
-    text_block = "\n".join([f"- {r}" for r in request.reports])
-    
-    prompt = f"""
-    You are an assistant for a city management system. 
-    Summarize the following citizen reports into a concise 3-sentence overview highlighting the main issues and locations.
-    
-    Reports:
-    {text_block}
-    
-    Summary:
-    """
-    
+
+    key = request.cache_key()
+    cached = summary_cache.get(key)
+    if cached is not None:
+        return {"summary": cached, "cached": True}
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150
-        )
-        summary = response.choices[0].message.content.strip()
-        return {"summary": summary}
+        summary = await summarizer.summarize(request.texts())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    summary_cache.set(key, summary)
+    return {"summary": summary}
+
+def sse(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/summarize/stream")
+async def summarize_stream(request: SummarizeRequest):
+    """
+    Server-sent events: `meta` once the chunk summaries are done, one
+    unnamed event per {"delta": ...} of the final summary, then `done` with
+    the full text (or `error`).
+    """
+    key = request.cache_key()
+
+    async def events():
+        if not request.reports:
+            yield sse({"summary": "No reports to summarize."}, "done")
+            return
+        cached = summary_cache.get(key)
+        if cached is not None:
+            yield sse({"cached": True}, "meta")
+            yield sse({"delta": cached})
+            yield sse({"summary": cached}, "done")
+            return
+        try:
+            items = await summarizer.condense(request.texts())
+            yield sse({"cached": False, "reports": len(request.reports), "condensed_items": len(items)}, "meta")
+            parts = []
+            async for delta in summarizer.stream_summary(items):
+                parts.append(delta)
+                yield sse({"delta": delta})
+        except Exception as e:
+            yield sse({"detail": str(e)}, "error")
+            return
+        summary = "".join(parts).strip()
+        summary_cache.set(key, summary)
+        yield sse({"summary": summary}, "done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/cache/stats")
+def cache_stats():
+    return summary_cache.stats()
 
 @app.post("/generate_sql", response_model=SQLResponse)
-def generate_sql(request: SQLRequest):
+async def generate_sql(request: SQLRequest):
     # Schema context for the LLM
     schema_context = """
     Table: reports
@@ -87,8 +144,8 @@ def generate_sql(request: SQLRequest):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await client.chat.completions.create(
+            model=LLM_MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0
         )
@@ -0,0 +1,94 @@
+"""
+OpenAI-compatible stand-in for offline development and tests.
+
+Implements POST /v1/chat/completions (plain and stream=True) with
+deterministic answers: the first words of each "- " line of the prompt.
+Run it and point the service at it:
+
+    uvicorn stub_llm:app --port 9099
+    OPENAI_BASE_URL=http://localhost:9099/v1 OPENAI_API_KEY=stub uvicorn service:app --port 9002
+
+STUB_LLM_DELAY_MS adds latency per completion to make concurrency visible.
+"""
+import asyncio
+import json
+import time
+import uuid
+from typing import List, Optional
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import os
+
+STUB_LLM_DELAY_MS = float(os.getenv("STUB_LLM_DELAY_MS", 50))
+
+app = FastAPI(title="Stub LLM")
+
+class Message(BaseModel):
+    role: str
+    content: str
+
+class ChatRequest(BaseModel):
+    model: str
+    messages: List[Message]
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    stream: bool = False
+
+# Completions served, so tests can check how many calls a request made
+calls = {"count": 0}
+
+def stub_answer(prompt: str, max_tokens: Optional[int]) -> str:
+    lines = [line.strip()[2:] for line in prompt.splitlines() if line.strip().startswith("- ")]
+    if not lines:
+        return "SELECT 1" if "SQL" in prompt else "Nothing to report."
+    words = " ".join(" ".join(line.split()[:6]) + ";" for line in lines).split()
+    return " ".join(words[: max_tokens or len(words)])
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: ChatRequest):
+    calls["count"] += 1
+    await asyncio.sleep(STUB_LLM_DELAY_MS / 1000)
+    answer = stub_answer(request.messages[-1].content, request.max_tokens)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+
+    if not request.stream:
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": request.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    async def chunks():
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            delta = {"content": word if i == 0 else " " + word}
+            yield "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": request.model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }) + "\n\n"
+        yield "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": request.model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }) + "\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+@app.get("/calls")
+def get_calls():
+    return calls
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Sequence
+import os
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a character-based estimate
+    tiktoken = None
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+# Token budget for the reports in one prompt, leaving room for instructions and the answer
+LLM_CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", 3000))
+LLM_MAP_MAX_TOKENS = int(os.getenv("LLM_MAP_MAX_TOKENS", 200))
+# Map rounds that stop shrinking the input retry with half the answer length, down to this
+LLM_MAP_MIN_TOKENS = int(os.getenv("LLM_MAP_MIN_TOKENS", 32))
+LLM_SUMMARY_MAX_TOKENS = int(os.getenv("LLM_SUMMARY_MAX_TOKENS", 150))
+# Concurrent chunk summaries per request
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", 256))
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", 3600))
+
+MAP_PROMPT = """
+You are an assistant for a city management system.
+List the main issues in the following citizen reports as short bullet points, keeping locations and how often each issue occurs.
+
+Reports:
+{items}
+
+Issues:
+"""
+
+SUMMARY_PROMPT = """
+You are an assistant for a city management system.
+Summarize the following citizen reports into a concise 3-sentence overview highlighting the main issues and locations.
+
+Reports:
+{items}
+
+Summary:
+"""
+
+_encoding = None
+_encoding_unavailable = tiktoken is None
+
+def count_tokens(text: str) -> int:
+    global _encoding, _encoding_unavailable
+    if _encoding is None and not _encoding_unavailable:
+        try:
+            try:
+                _encoding = tiktoken.encoding_for_model(LLM_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads encodings on first use unless they are in
+            # TIKTOKEN_CACHE_DIR (the Docker image bakes them in)
+            print(f"tiktoken encoding unavailable ({e!r}); estimating tokens from characters")
+            _encoding_unavailable = True
+    if _encoding is None:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text))
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    if count_tokens(text) <= budget:
+        return text
+    # Shrink proportionally until it fits
+    while count_tokens(text) > budget and len(text) > 1:
+        text = text[: max(1, int(len(text) * budget / count_tokens(text) * 0.95))]
+    return text
+
+def chunk_by_tokens(items: Sequence[str], budget: int = LLM_CHUNK_TOKENS) -> List[List[str]]:
+    """Greedy, order-preserving packing of items into chunks of at most `budget` tokens."""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for item in items:
+        item = truncate_to_tokens(item, budget)
+        cost = count_tokens(item) + 2  # bullet and newline
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _format(items: Sequence[str]) -> str:
+    return "\n".join(f"- {item}" for item in items)
+
+def cache_key(report_texts: Sequence[str], report_versions: Optional[Sequence[tuple]] = None) -> str:
+    """
+    Hash of the (report id, updated_at) set when the caller sends ids,
+    otherwise of the report texts themselves.
+    """
+    if report_versions:
+        material = json.dumps(sorted([str(i), str(u)] for i, u in report_versions))
+    else:
+        material = json.dumps(list(report_texts))
+    return hashlib.sha256(f"{LLM_MODEL}|{material}".encode()).hexdigest()
+
+class SummaryCache:
+    """LRU of finished summaries with a TTL."""
+
+    def __init__(self, max_items: int, ttl_seconds: float):
+        self.max_items = max_items
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            self._data.pop(key, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, summary: str):
+        self._data[key] = (summary, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_items:
+            self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+summary_cache = SummaryCache(SUMMARY_CACHE_SIZE, SUMMARY_CACHE_TTL_SECONDS)
+
+class Summarizer:
+    """
+    Map-reduce summarization: reports are packed into token-budgeted chunks,
+    each chunk is condensed concurrently, and the condensed lists are reduced
+    (again in chunks if they are still too long) into the final overview.
+    """
+
+    def __init__(self, client, model: str = LLM_MODEL, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content.strip()
+
+    async def condense(self, reports: Sequence[str]) -> List[str]:
+        """Map until the items fit a single summary prompt. Returns the items to reduce."""
+        items = list(reports)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def condense_chunk(chunk: List[str], max_tokens: int) -> str:
+            async with semaphore:
+                return await self._complete(MAP_PROMPT.format(items=_format(chunk)), max_tokens)
+
+        chunks = chunk_by_tokens(items)
+        max_tokens = LLM_MAP_MAX_TOKENS
+        while len(chunks) > 1:
+            items = await asyncio.gather(*(condense_chunk(chunk, max_tokens) for chunk in chunks))
+            next_chunks = chunk_by_tokens(items)
+            if len(next_chunks) >= len(chunks):
+                # Condensing no longer shrinks the input: condense the condensed items
+                # again with a shorter answer, and once that is at its floor, trim
+                # every item to an equal share of one prompt so no chunk is dropped
+                if max_tokens > LLM_MAP_MIN_TOKENS:
+                    max_tokens = max(LLM_MAP_MIN_TOKENS, max_tokens // 2)
+                else:
+                    share = max(1, LLM_CHUNK_TOKENS // len(items) - 2)
+                    print(f"Condensed reports still exceed the prompt budget; trimming {len(items)} items "
+                          f"to {share} tokens each")
+                    next_chunks = [[truncate_to_tokens(item, share) for item in items]]
+            chunks = next_chunks
+        return chunks[0] if chunks else []
+
+    async def summarize(self, reports: Sequence[str]) -> str:
+        items = await self.condense(reports)
+        return await self._complete(SUMMARY_PROMPT.format(items=_format(items)), LLM_SUMMARY_MAX_TOKENS)
+
+    async def stream_summary(self, items: Sequence[str]) -> AsyncIterator[str]:
+        """Stream the final reduce step over already condensed items."""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": SUMMARY_PROMPT.format(items=_format(items))}],
+            max_tokens=LLM_SUMMARY_MAX_TOKENS,
+            stream=True,
+        )
+        async for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
@@ -0,0 +1,6 @@
+"""Shared setup for the ai-llm tests. They run against stub_llm in-process, with no network."""
+import os
+import sys
+
+os.environ.setdefault("STUB_LLM_DELAY_MS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+"""Map-reduce summarization against the stub LLM, served in-process."""
+import asyncio
+import re
+import httpx
+from openai import AsyncOpenAI
+import stub_llm
+from summarizer import LLM_CHUNK_TOKENS, Summarizer, chunk_by_tokens, count_tokens
+
+def stub_client() -> AsyncOpenAI:
+    transport = httpx.ASGITransport(app=stub_llm.app)
+    return AsyncOpenAI(
+        base_url="http://stub/v1",
+        api_key="stub",
+        http_client=httpx.AsyncClient(transport=transport, base_url="http://stub/v1"),
+    )
+
+def make_reports(n: int):
+    # The stub answers with the first six words of each report, so the id survives one map round
+    filler = "cars swerving around it at night and the edge keeps crumbling into the gutter " * 6
+    return [f"R{i:04d} pothole on Elm street {filler}".strip() for i in range(n)]
+
+def test_condense_covers_every_report():
+    reports = make_reports(60)
+    assert len(chunk_by_tokens(reports)) > 1
+
+    async def body():
+        calls_before = stub_llm.calls["count"]
+        items = await Summarizer(stub_client()).condense(reports)
+        return items, stub_llm.calls["count"] - calls_before
+
+    items, calls = asyncio.run(body())
+    assert calls == len(chunk_by_tokens(reports))
+    assert sum(count_tokens(item) + 2 for item in items) <= LLM_CHUNK_TOKENS
+    covered = set(re.findall(r"R\d{4}", " ".join(items)))
+    assert covered == {f"R{i:04d}" for i in range(60)}
+
+def test_single_chunk_skips_map():
+    reports = make_reports(3)
+
+    async def body():
+        calls_before = stub_llm.calls["count"]
+        summarizer = Summarizer(stub_client())
+        items = await summarizer.condense(reports)
+        summary = await summarizer.summarize(reports)
+        return items, summary, stub_llm.calls["count"] - calls_before
+
+    items, summary, calls = asyncio.run(body())
+    assert items == reports
+    assert calls == 1  # only the reduce in summarize()
+    assert summary.startswith("R0000 pothole on Elm street")
@@ -0,0 +1,40 @@
+import asyncio
+import argparse
+from sqlalchemy import text
+from database import AsyncSessionLocal, engine
+from services.enrichment import process_batch
+
+async def backfill(drain: bool):
+    """Queue enrichment jobs for every report that has no embedding yet."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(text("""
+            INSERT INTO enrichment_jobs (report_id, attempts, run_after, created_at)
+            SELECT id, 0, NOW(), NOW()
+            FROM reports
+            WHERE embedding IS NULL
+            ON CONFLICT (report_id) DO NOTHING
+        """))
+        await db.execute(text("""
+            UPDATE reports SET enrichment_status = 'pending'
+            WHERE embedding IS NULL AND enrichment_status IS DISTINCT FROM 'pending'
+        """))
+        await db.commit()
+        print(f"Queued {result.rowcount} reports for enrichment")
+
+    if drain:
+        # Process in the foreground instead of waiting for the API workers
+        total = 0
+        while True:
+            claimed = await process_batch()
+            if claimed == 0:
+                break
+            total += claimed
+            print(f"Processed {total} jobs")
+
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill AI enrichment for reports with NULL embeddings")
+    parser.add_argument("--drain", action="store_true", help="Process the queue here until it is empty")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.drain))
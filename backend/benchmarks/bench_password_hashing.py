@@ -0,0 +1,75 @@
+"""
+Event-loop lag during a login storm, with bcrypt run inline versus on the
+bounded hashing pool.
+
+A ticker coroutine sleeps for --tick-ms in a loop and records how late it
+wakes up; that overshoot is the latency every other request on the worker
+would see. --logins concurrent password checks run alongside it.
+
+    python benchmarks/bench_password_hashing.py --logins 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.security import get_password_hash, verify_password, verify_password_async, BCRYPT_WORKERS  # noqa: E402
+
+async def inline_login(password, hashed):
+    # What the login handler used to do: bcrypt on the event loop thread
+    return verify_password(password, hashed)
+
+async def pooled_login(password, hashed):
+    return await verify_password_async(password, hashed)
+
+async def measure(login, logins: int, tick_ms: float, password: str, hashed: str):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        interval = tick_ms / 1000
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append((time.perf_counter() - started - interval) * 1000)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(tick_ms / 1000)  # let the ticker start
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    await ticker_task
+    assert all(results)
+
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "logins_per_s": logins / elapsed,
+        "lag_p50_ms": statistics.median(lags),
+        "lag_p99_ms": lags[min(len(lags) - 1, int(len(lags) * 0.99))],
+        "lag_max_ms": lags[-1],
+        "ticks": len(lags),
+    }
+
+async def main(args):
+    password = "correct horse battery staple"
+    hashed = get_password_hash(password)
+    print(f"{args.logins} concurrent logins, bcrypt pool of {BCRYPT_WORKERS} threads\n")
+    print(f"{'mode':<8} {'elapsed s':>10} {'logins/s':>10} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+    for name, login in (("inline", inline_login), ("pooled", pooled_login)):
+        r = await measure(login, args.logins, args.tick_ms, password, hashed)
+        print(f"{name:<8} {r['elapsed_s']:>10.2f} {r['logins_per_s']:>10.1f} "
+              f"{r['lag_p50_ms']:>11.2f} {r['lag_p99_ms']:>11.2f} {r['lag_max_ms']:>11.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--tick-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
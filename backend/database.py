@@ -1,20 +1,85 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from alembic.config import Config
+from alembic.script import ScriptDirectory
 import os
 from dotenv import load_dotenv
+from settings import db_settings
 
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://admin:admin123@db:5432/citizen_ai")
+DATABASE_URL = db_settings.url
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# strict: refuse to start on an unmigrated database; warn: log and continue; off: skip
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "strict")
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+def make_engine(url: str):
+    url = make_url(url).update_query_dict(
+        {"prepared_statement_cache_size": str(db_settings.prepared_statement_cache_size)}
+    )
+    server_settings = {"application_name": "citizen-backend"}
+    if db_settings.statement_timeout_ms:
+        server_settings["statement_timeout"] = str(db_settings.statement_timeout_ms)
+
+    return create_async_engine(
+        url,
+        echo=db_settings.echo,
+        pool_size=db_settings.pool_size,
+        max_overflow=db_settings.max_overflow,
+        pool_timeout=db_settings.pool_timeout,
+        pool_recycle=db_settings.pool_recycle,
+        pool_pre_ping=db_settings.pool_pre_ping,
+        connect_args={"server_settings": server_settings},
+    )
+
+engine = make_engine(DATABASE_URL)
+# Falls back to the primary when no replica is configured
+read_engine = make_engine(db_settings.replica_url) if db_settings.replica_url else engine
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
+ReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 Base = declarative_base()
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+async def get_read_db():
+    """Session for read-only endpoints; may lag the primary slightly."""
+    async with ReadSessionLocal() as session:
+        yield session
+
+async def check_schema_version():
+    """
+    Compare the database's Alembic revision with this build's head.
+    Schema changes are applied once per deploy with `alembic upgrade head`,
+    so workers only pay for this one SELECT at startup.
+    """
+    if SCHEMA_CHECK == "off":
+        return
+
+    expected = set(ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_heads())
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = {row[0] for row in result}
+    except DBAPIError:
+        current = set()
+
+    if current != expected:
+        message = (
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(expected)}. "
+            "Run `alembic upgrade head`."
+        )
+        if SCHEMA_CHECK == "strict":
+            raise RuntimeError(message)
+        print(f"Warning: {message}")
@@ -1,7 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import auth, reports, analytics, votes
+from database import check_schema_version
+from routers import auth, reports, analytics, votes, metrics, map, user
+from utils.ai_client import start_clients, close_clients
+from services.enrichment import start_workers, stop_workers
+from services.votes import start_flusher, stop_flusher
+from services.hotspots import start_refresher, stop_refresher
+from services import status_history
+from utils.response_cache import response_cache
 
 app = FastAPI(title="Citizen AI System API")
 
@@ -19,20 +25,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include Routers
 app.include_router(auth.router)
+app.include_router(user.router)
 app.include_router(reports.router)
 app.include_router(votes.router)
 app.include_router(analytics.router)
+app.include_router(map.router)
+app.include_router(metrics.router)
 
 @app.on_event("startup")
 async def startup():
-    # Create tables on startup (for MVP)
-    async with engine.begin() as conn:
-        # await conn.run_sync(Base.metadata.drop_all) # Uncomment to reset DB
-        await conn.run_sync(Base.metadata.create_all)
+    # Migrations run once per deploy; workers only verify the revision
+    await check_schema_version()
+    # Shared keep-alive pool for AI service calls
+    await start_clients()
+    # Background AI enrichment of newly submitted reports
+    start_workers()
+    # Only runs when VOTE_COUNTER_SHARDS > 0
+    start_flusher()
+    # Keeps the predictive-maintenance hotspot table up to date
+    start_refresher()
+    # Recomputes SLA percentiles from the status event log
+    status_history.start_refresher()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await status_history.stop_refresher()
+    await stop_refresher()
+    await stop_flusher()
+    await stop_workers()
+    await close_clients()
+    await response_cache.close()
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,100 @@
+"""initial schema
+
+The schema as previously created by Base.metadata.create_all. Databases
+that were bootstrapped that way should be marked with
+`alembic stamp 0001` before running `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geometry
+from pgvector.sqlalchemy import Vector
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    op.create_table(
+        "departments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), unique=True),
+        sa.Column("slug", sa.String(), unique=True),
+    )
+    op.create_index("ix_departments_id", "departments", ["id"])
+
+    op.create_table(
+        "field_teams",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("current_lat", sa.Float(), nullable=True),
+        sa.Column("current_lon", sa.Float(), nullable=True),
+        sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id")),
+    )
+    op.create_index("ix_field_teams_id", "field_teams", ["id"])
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("role", sa.Enum("citizen", "admin", name="userrole")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "reports",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("category", sa.String()),
+        sa.Column(
+            "status",
+            sa.Enum("pending", "assigned", "in_progress", "resolved", "closed", "reopened", "rejected",
+                    name="reportstatus"),
+        ),
+        sa.Column("severity", sa.Enum("low", "medium", "high", "critical", name="reportseverity")),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("resolution_image_url", sa.String(), nullable=True),
+        sa.Column("citizen_feedback", sa.Text(), nullable=True),
+        sa.Column("location", Geometry("POINT", srid=4326, spatial_index=False)),
+        sa.Column("embedding", Vector(384)),
+        sa.Column("upvotes", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id"), nullable=True),
+        sa.Column("assigned_team_id", sa.Integer(), sa.ForeignKey("field_teams.id"), nullable=True),
+    )
+    op.create_index("ix_reports_id", "reports", ["id"])
+    op.create_index("ix_reports_title", "reports", ["title"])
+    op.create_index("ix_reports_category", "reports", ["category"])
+    op.create_index("idx_reports_location", "reports", ["location"], postgresql_using="gist")
+
+    op.create_table(
+        "votes",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id"), primary_key=True),
+        sa.Column("value", sa.Integer()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("votes")
+    op.drop_table("reports")
+    op.drop_table("users")
+    op.drop_table("field_teams")
+    op.drop_table("departments")
+    for enum_name in ("reportseverity", "reportstatus", "userrole"):
+        op.execute(f"DROP TYPE IF EXISTS {enum_name}")
@@ -0,0 +1,40 @@
+"""spatial and composite indexes
+
+- Functional GiST index on geography(location) so meter-based ST_DWithin
+  radius filters are index-assisted instead of casting every row.
+- Composite B-tree indexes for the common report list filters and for
+  keyset pagination on (created_at, id).
+
+Indexes are built CONCURRENTLY so the reports table stays writable.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_reports_location_geog": "USING gist (geography(location))",
+    "ix_reports_created_at_id": "(created_at, id)",
+    "ix_reports_category_status_created_at": "(category, status, created_at)",
+    "ix_reports_status_created_at": "(status, created_at)",
+    "ix_reports_department_status_created_at": "(department_id, status, created_at)",
+}
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON reports {definition}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,53 @@
+"""report hotspots
+
+Precomputed DBSCAN hotspot table, its refresh bookkeeping, and an index on
+reports.updated_at used to find categories that changed since the last refresh.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geometry
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_hotspots",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("category", sa.String()),
+        sa.Column("cluster_id", sa.Integer()),
+        sa.Column("report_count", sa.Integer()),
+        sa.Column("recent_count", sa.Integer()),
+        sa.Column("previous_count", sa.Integer()),
+        sa.Column("centroid", Geometry("POINT", srid=4326, spatial_index=False)),
+        sa.Column("bounds", Geometry("GEOMETRY", srid=4326, spatial_index=False)),
+        sa.Column("first_reported_at", sa.DateTime(timezone=True)),
+        sa.Column("last_reported_at", sa.DateTime(timezone=True)),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_report_hotspots_category", "report_hotspots", ["category"])
+
+    op.create_table(
+        "hotspot_refresh_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True)),
+        sa.Column("full_refreshed_at", sa.DateTime(timezone=True)),
+        sa.Column("params", sa.String()),
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reports_updated_at ON reports (updated_at)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_reports_updated_at")
+    op.drop_table("hotspot_refresh_state")
+    op.drop_table("report_hotspots")
@@ -0,0 +1,51 @@
+"""report rollups
+
+Hourly/daily report counts per category, severity, department, geohash and
+status, backfilled from the existing reports.
+
+The backfill counts each report's current status in its creation bucket;
+live status transitions are recorded in the bucket they happen in, so only
+the history before this migration is approximate. Totals are exact.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_rollups",
+        sa.Column("granularity", sa.String(), primary_key=True),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("dimension", sa.String(), primary_key=True),
+        sa.Column("value", sa.String(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    op.execute("""
+        INSERT INTO report_rollups (granularity, bucket_start, dimension, value, count)
+        SELECT g.granularity, date_trunc(g.granularity, r.created_at), d.dimension, d.value, COUNT(*)
+        FROM reports r
+        CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+        CROSS JOIN LATERAL (VALUES
+            ('category', COALESCE(r.category, 'none')),
+            ('severity', COALESCE(r.severity::text, 'none')),
+            ('department', COALESCE(r.department_id::text, 'none')),
+            ('geohash', COALESCE(ST_GeoHash(r.location, 5), 'none')),
+            ('status', COALESCE(r.status::text, 'none'))
+        ) AS d(dimension, value)
+        WHERE r.created_at IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("report_rollups")
@@ -0,0 +1,71 @@
+"""report status events
+
+Append-only status history and the precomputed SLA percentile table.
+
+Existing reports get a creation event at created_at and, when they have
+moved on from pending, one transition to their current status at
+updated_at. Earlier intermediate transitions were never recorded.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+reportstatus = postgresql.ENUM(name="reportstatus", create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_status_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("from_status", reportstatus, nullable=True),
+        sa.Column("to_status", reportstatus, nullable=False),
+        sa.Column("changed_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    op.execute("""
+        INSERT INTO report_status_events (report_id, from_status, to_status, created_at)
+        SELECT id, NULL, 'pending', created_at FROM reports WHERE created_at IS NOT NULL
+    """)
+    op.execute("""
+        INSERT INTO report_status_events (report_id, from_status, to_status, created_at)
+        SELECT id, 'pending', status, COALESCE(updated_at, created_at)
+        FROM reports
+        WHERE created_at IS NOT NULL AND status IS NOT NULL AND status <> 'pending'
+    """)
+
+    op.create_index(
+        "ix_report_status_events_report_id_created_at", "report_status_events", ["report_id", "created_at"]
+    )
+    op.create_index(
+        "ix_report_status_events_created_at_brin", "report_status_events", ["created_at"], postgresql_using="brin"
+    )
+
+    op.create_table(
+        "report_sla_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("scope", sa.String(), nullable=False),
+        sa.Column("scope_id", sa.Integer(), nullable=True),
+        sa.Column("metric", sa.String(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("p50_seconds", sa.Float()),
+        sa.Column("p90_seconds", sa.Float()),
+        sa.Column("p99_seconds", sa.Float()),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_report_sla_stats_scope", "report_sla_stats", ["scope", "scope_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("report_sla_stats")
+    op.drop_table("report_status_events")
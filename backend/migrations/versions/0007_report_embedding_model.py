@@ -0,0 +1,26 @@
+"""report embedding model
+
+Records which ai-duplicate embedding model produced reports.embedding, so
+reembed_reports.py can find rows left on an older model. Existing embeddings
+all came from the original all-MiniLM-L6-v2 model.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("reports", sa.Column("embedding_model", sa.String(), nullable=True))
+    op.execute("UPDATE reports SET embedding_model = 'all-MiniLM-L6-v2' WHERE embedding IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column("reports", "embedding_model")
@@ -0,0 +1,54 @@
+"""report enrichment queue
+
+- reports.enrichment_status and the enrichment_jobs queue drained by the
+  background worker in services/enrichment.py. Existing reports were
+  enriched synchronously on submission, so they are marked complete.
+- HNSW index on reports.embedding (pgvector >= 0.5), built CONCURRENTLY
+  so the reports table stays writable.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+enrichment_status = postgresql.ENUM("pending", "complete", "failed", name="enrichmentstatus")
+
+
+def upgrade() -> None:
+    enrichment_status.create(op.get_bind())
+    op.add_column("reports", sa.Column("enrichment_status", enrichment_status, nullable=True))
+    op.execute("UPDATE reports SET enrichment_status = 'complete'")
+
+    op.create_table(
+        "enrichment_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("report_id", sa.Integer(), sa.ForeignKey("reports.id", ondelete="CASCADE"), unique=True),
+        sa.Column("attempts", sa.Integer()),
+        sa.Column("run_after", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_enrichment_jobs_run_after", "enrichment_jobs", ["run_after"])
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reports_embedding_hnsw ON reports
+            USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_reports_embedding_hnsw")
+    op.drop_table("enrichment_jobs")
+    op.drop_column("reports", "enrichment_status")
+    enrichment_status.drop(op.get_bind())
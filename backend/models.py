@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, Text, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
 from pgvector.sqlalchemy import Vector
 from database import Base
 import enum
+import os
+
+# Must match the ai-duplicate embedding model; reembed_reports.py --shadow changes it
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 384))
 
 class UserRole(str, enum.Enum):
     citizen = "citizen"
@@ -25,6 +29,11 @@ class ReportSeverity(str, enum.Enum):
     high = "high"
     critical = "critical"
 
+class EnrichmentStatus(str, enum.Enum):
+    pending = "pending"   # Waiting for AI category/severity/embedding
+    complete = "complete"
+    failed = "failed"     # Gave up after retries; keyword fallback applied
+
 class Department(Base):
     __tablename__ = "departments"
     
@@ -77,8 +86,11 @@ class Report(Base):
     # Spatial column: Point in WGS84 (SRID 4326)
     location = Column(Geometry("POINT", srid=4326))
     
-    # Embedding for duplicate detection
-    embedding = Column(Vector(384))
+    # Embedding for duplicate detection, and the ai-duplicate model version that produced it
+    embedding = Column(Vector(EMBEDDING_DIM))
+    embedding_model = Column(String, nullable=True)
+    
+    enrichment_status = Column(Enum(EnrichmentStatus), default=EnrichmentStatus.pending)
     
     upvotes = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -93,6 +105,27 @@ class Report(Base):
     assigned_team = relationship("FieldTeam", back_populates="reports")
     votes = relationship("Vote", back_populates="report")
 
+    __table_args__ = (
+        # Meter-based radius queries filter on geography(location)
+        Index("ix_reports_location_geog", func.geography(location), postgresql_using="gist"),
+        # Keyset pagination and the common list filters
+        Index("ix_reports_created_at_id", "created_at", "id"),
+        Index("ix_reports_category_status_created_at", "category", "status", "created_at"),
+        Index("ix_reports_status_created_at", "status", "created_at"),
+        Index("ix_reports_department_status_created_at", "department_id", "status", "created_at"),
+        # Change detection for incremental refreshes
+        Index("ix_reports_updated_at", "updated_at"),
+        # ANN index for whole-table nearest-neighbour queries (pgvector >= 0.5). Duplicate
+        # search ranks its radius candidates exactly instead (services/duplicates.py)
+        Index(
+            "ix_reports_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
 class Vote(Base):
     __tablename__ = "votes"
 
@@ -102,3 +135,92 @@ class Vote(Base):
 
     user = relationship("User", back_populates="votes")
     report = relationship("Report", back_populates="votes")
+
+class EnrichmentJob(Base):
+    """Queue of reports waiting for AI enrichment, claimed with FOR UPDATE SKIP LOCKED."""
+    __tablename__ = "enrichment_jobs"
+
+    id = Column(Integer, primary_key=True)
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), unique=True)
+    attempts = Column(Integer, default=0)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class VoteCounterShard(Base):
+    """Pending upvote deltas for hot reports, folded into reports.upvotes periodically."""
+    __tablename__ = "vote_counter_shards"
+
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    delta = Column(Integer, nullable=False, default=0)
+
+class ReportHotspot(Base):
+    """DBSCAN clusters of recent reports per category, kept fresh by services/hotspots.py."""
+    __tablename__ = "report_hotspots"
+
+    id = Column(Integer, primary_key=True)
+    category = Column(String, index=True)
+    cluster_id = Column(Integer)
+    report_count = Column(Integer)
+    recent_count = Column(Integer)
+    previous_count = Column(Integer)
+    centroid = Column(Geometry("POINT", srid=4326, spatial_index=False))
+    bounds = Column(Geometry("GEOMETRY", srid=4326, spatial_index=False))
+    first_reported_at = Column(DateTime(timezone=True))
+    last_reported_at = Column(DateTime(timezone=True))
+    refreshed_at = Column(DateTime(timezone=True))
+
+class HotspotRefreshState(Base):
+    __tablename__ = "hotspot_refresh_state"
+
+    id = Column(Integer, primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True))
+    full_refreshed_at = Column(DateTime(timezone=True))
+    params = Column(String)
+
+class ReportRollup(Base):
+    """Hourly and daily report counts per dimension value, maintained by services/rollups.py."""
+    __tablename__ = "report_rollups"
+
+    granularity = Column(String, primary_key=True)  # hour | day
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    dimension = Column(String, primary_key=True)    # category | severity | department | geohash | status
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ReportStatusEvent(Base):
+    """Append-only log of report status transitions."""
+    __tablename__ = "report_status_events"
+
+    id = Column(Integer, primary_key=True)
+    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), nullable=False)
+    from_status = Column(Enum(ReportStatus), nullable=True)  # NULL for the creation event
+    to_status = Column(Enum(ReportStatus), nullable=False)
+    changed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # A report's history in order
+        Index("ix_report_status_events_report_id_created_at", "report_id", "created_at"),
+        # Rows are appended in time order, so a tiny BRIN index covers the SLA window scans
+        Index("ix_report_status_events_created_at_brin", "created_at", postgresql_using="brin"),
+    )
+
+class ReportSlaStat(Base):
+    """Percentile time spent in each status, per department and field team, kept fresh by services/status_history.py."""
+    __tablename__ = "report_sla_stats"
+
+    id = Column(Integer, primary_key=True)
+    scope = Column(String, nullable=False)      # all | department | team
+    scope_id = Column(Integer, nullable=True)   # department or field team id
+    metric = Column(String, nullable=False)     # a status name, or time_to_resolve
+    sample_count = Column(Integer, nullable=False)
+    p50_seconds = Column(Float)
+    p90_seconds = Column(Float)
+    p99_seconds = Column(Float)
+    refreshed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_report_sla_stats_scope", "scope", "scope_id"),
+    )
@@ -0,0 +1,258 @@
+"""
+Re-embed every report with the embedding model the ai-duplicate service now
+serves, in bulk, without one /embed call per row.
+
+Rows are read in --batch-size pages, keyed on id so every page is its own
+short query, and sent to /embed_batch. The vectors go back in one
+UPDATE ... FROM unnest() per page, committed as it lands, and the next page
+is encoded while the last one is written. No transaction stays open across
+the run to hold back vacuum or the swap's lock. A rerun skips every row already done, so an interrupted run
+resumes where it stopped. Rows inserted while a pass runs are picked up by
+the next pass.
+
+Same dimension, and mixed old/new vectors acceptable for a while:
+
+    python reembed_reports.py
+
+Otherwise, through a shadow column. Search keeps using `embedding` until the
+swap:
+
+    AI_DUPLICATE_URL=http://ai-duplicate-next:9001 python reembed_reports.py --shadow
+    AI_DUPLICATE_URL=http://ai-duplicate-next:9001 python reembed_reports.py --shadow --swap
+
+--swap builds the HNSW index concurrently and catches up again. Then it
+takes a short ACCESS EXCLUSIVE lock and runs only SQL under it. If a row
+fell behind in the meantime, it releases the lock, catches up and retries.
+Otherwise it drops the old column and renames the shadow column into
+place. Immediately afterwards, set EMBEDDING_DIM and point the backend's
+AI_DUPLICATE_URL at the new service. Enrichment jobs that fail in between
+are retried. A plain (in-place) run afterwards catches any row still on
+the old model.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+import httpx
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from database import engine
+from services.enrichment import report_text
+from utils.ai_client import AI_DUPLICATE_URL
+
+SHADOW_COLUMN = "embedding_next"
+SHADOW_MODEL_COLUMN = "embedding_next_model"
+SHADOW_INDEX = "ix_reports_embedding_next_hnsw"
+
+class BatchEncoder:
+    """Client for ai-duplicate /embed_batch that insists on one model version."""
+
+    def __init__(self, base_url: str, timeout: float, retries: int = 3):
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+        self.retries = retries
+        self.model = None
+        self.dim = None
+
+    async def encode(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.retries):
+            try:
+                response = await self.client.post("/embed_batch", json={"texts": texts})
+                response.raise_for_status()
+                break
+            except httpx.HTTPError as e:
+                if attempt == self.retries - 1:
+                    raise
+                print(f"/embed_batch failed ({e!r}), retrying")
+                await asyncio.sleep(2 ** attempt)
+        body = response.json()
+        if self.model is None:
+            self.model, self.dim = body["model"], body["dim"]
+        elif body["model"] != self.model:
+            # e.g. a rolling deploy behind the URL; vectors would be incomparable
+            raise RuntimeError(f"Service switched from {self.model} to {body['model']} mid-run")
+        return body["embeddings"]
+
+    async def close(self):
+        await self.client.aclose()
+
+async def column_dim(conn, column: str):
+    """Declared dimension of a vector column on reports, or None if it doesn't exist."""
+    result = await conn.execute(text("""
+        SELECT atttypmod FROM pg_attribute
+        WHERE attrelid = 'reports'::regclass AND attname = :column AND NOT attisdropped
+    """), {"column": column})
+    return result.scalar()
+
+async def write_batch(conn, ids: List[int], embeddings: List[List[float]],
+                      column: str, model_column: str, model: str):
+    await conn.execute(text(f"""
+        UPDATE reports r
+        SET {column} = CAST(u.embedding AS vector), {model_column} = :model
+        FROM unnest(CAST(:ids AS integer[]), CAST(:embeddings AS text[])) AS u(id, embedding)
+        WHERE r.id = u.id
+    """), {"ids": ids, "embeddings": [json.dumps(e) for e in embeddings], "model": model})
+
+async def commit_batch(*args):
+    async with engine.begin() as conn:
+        await write_batch(conn, *args)
+
+async def fetch_page(pending: str, model: str, after_id: int, limit: int):
+    async with engine.connect() as conn:
+        result = await conn.execute(text(f"""
+            SELECT id, title, description FROM reports
+            WHERE {pending} AND id > :after_id
+            ORDER BY id LIMIT :limit
+        """), {"model": model, "after_id": after_id, "limit": limit})
+        return result.all()
+
+async def run_pass(encoder: BatchEncoder, column: str, model_column: str, args) -> int:
+    """Re-embed every row not yet on encoder.model. Returns rows written."""
+    pending = f"embedding IS NOT NULL AND {model_column} IS DISTINCT FROM :model"
+    async with engine.connect() as conn:
+        total = (await conn.execute(text(f"SELECT count(*) FROM reports WHERE {pending}"), {"model": encoder.model})).scalar()
+    if total == 0:
+        return 0
+    print(f"{total} reports to re-embed into {column}")
+
+    done = 0
+    last_id = 0
+    started = time.perf_counter()
+    write = None
+    while rows := await fetch_page(pending, encoder.model, last_id, args.batch_size):
+        # Encoding this page overlaps with writing the previous one
+        embeddings = await encoder.encode([report_text(row) for row in rows])
+        if write is not None:
+            await write
+        write = asyncio.create_task(commit_batch(
+            [row.id for row in rows], embeddings, column, model_column, encoder.model
+        ))
+        last_id = rows[-1].id
+        done += len(rows)
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed else 0.0
+        eta = max(0, total - done) / rate if rate else 0.0
+        print(f"{done}/{total} rows  {rate:.0f} rows/s  ETA {eta:.0f}s")
+    if write is not None:
+        await write
+    return done
+
+async def run_until_done(encoder: BatchEncoder, column: str, model_column: str, args):
+    # Later passes pick up rows embedded by the old model while the previous pass ran
+    while await run_pass(encoder, column, model_column, args):
+        pass
+
+async def ensure_shadow_column(encoder: BatchEncoder):
+    async with engine.begin() as conn:
+        dim = await column_dim(conn, SHADOW_COLUMN)
+        if dim is None:
+            await conn.execute(text(
+                f"ALTER TABLE reports ADD COLUMN {SHADOW_COLUMN} vector({encoder.dim}), "
+                f"ADD COLUMN {SHADOW_MODEL_COLUMN} VARCHAR"
+            ))
+            print(f"Added reports.{SHADOW_COLUMN} vector({encoder.dim})")
+        elif dim != encoder.dim:
+            raise SystemExit(
+                f"reports.{SHADOW_COLUMN} is vector({dim}) but {encoder.model} returns {encoder.dim} dimensions; "
+                f"drop the column to start over"
+            )
+
+async def build_shadow_index():
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SET statement_timeout = 0"))
+        # A failed CREATE INDEX CONCURRENTLY leaves an invalid index behind
+        invalid = (await conn.execute(text("""
+            SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)
+        """), {"name": SHADOW_INDEX})).scalar()
+        if invalid:
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY {SHADOW_INDEX}"))
+        print(f"Building {SHADOW_INDEX}")
+        started = time.perf_counter()
+        await conn.execute(text(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS {SHADOW_INDEX} ON reports
+            USING hnsw ({SHADOW_COLUMN} vector_cosine_ops) WITH (m = 16, ef_construction = 64)
+        """))
+        print(f"Built {SHADOW_INDEX} in {time.perf_counter() - started:.0f}s")
+
+async def try_swap(encoder: BatchEncoder, args) -> int:
+    """
+    Replace embedding/embedding_model with the shadow columns in one short
+    transaction, if no row fell behind. Returns the rows behind (0 = swapped).
+    Nothing but SQL runs under the lock: it blocks every query on reports.
+    """
+    async with engine.connect() as conn:
+        await conn.execute(text(f"SET LOCAL lock_timeout = '{args.lock_timeout_ms}ms'"))
+        # Blocks enrichment writes, so no row can fall behind between the check and the rename
+        await conn.execute(text("LOCK TABLE reports IN ACCESS EXCLUSIVE MODE"))
+        behind = (await conn.execute(text(f"""
+            SELECT count(*) FROM reports
+            WHERE embedding IS NOT NULL AND {SHADOW_MODEL_COLUMN} IS DISTINCT FROM :model
+        """), {"model": encoder.model})).scalar()
+        if behind:
+            await conn.rollback()
+            return behind
+
+        # Metadata-only changes; the old column's space is reclaimed as rows are rewritten
+        await conn.execute(text("ALTER TABLE reports DROP COLUMN embedding, DROP COLUMN embedding_model"))
+        await conn.execute(text(f"ALTER TABLE reports RENAME COLUMN {SHADOW_COLUMN} TO embedding"))
+        await conn.execute(text(f"ALTER TABLE reports RENAME COLUMN {SHADOW_MODEL_COLUMN} TO embedding_model"))
+        await conn.execute(text(f"ALTER INDEX {SHADOW_INDEX} RENAME TO ix_reports_embedding_hnsw"))
+        await conn.commit()
+    return 0
+
+async def swap(encoder: BatchEncoder, args):
+    for attempt in range(1, args.swap_attempts + 1):
+        # Rows enriched by the old model since the last pass are encoded before any lock is taken
+        await run_until_done(encoder, SHADOW_COLUMN, SHADOW_MODEL_COLUMN, args)
+        try:
+            behind = await try_swap(encoder, args)
+        except DBAPIError as e:
+            # Typically lock_timeout behind a long-running query
+            if attempt == args.swap_attempts:
+                raise
+            print(f"Swap attempt {attempt} failed ({e.orig!r}), retrying")
+            continue
+        if behind == 0:
+            print(f"Swapped in {encoder.model} embeddings")
+            print(f"Now set EMBEDDING_DIM={encoder.dim} and point AI_DUPLICATE_URL at the service serving {encoder.model}")
+            return
+        print(f"{behind} rows fell behind before the lock was taken, catching up")
+    raise SystemExit("Rows kept falling behind; stop enrichment (ENRICHMENT_WORKERS=0) and rerun --swap")
+
+async def main(args):
+    encoder = BatchEncoder(args.service_url, args.timeout)
+    try:
+        # Learn which model and dimension the service serves
+        await encoder.encode(["probe"])
+        print(f"{args.service_url} serves {encoder.model} ({encoder.dim} dimensions)")
+
+        if args.shadow:
+            await ensure_shadow_column(encoder)
+            await run_until_done(encoder, SHADOW_COLUMN, SHADOW_MODEL_COLUMN, args)
+            if args.swap:
+                await build_shadow_index()
+                await swap(encoder, args)
+        else:
+            async with engine.connect() as conn:
+                dim = await column_dim(conn, "embedding")
+            if dim != encoder.dim:
+                raise SystemExit(f"reports.embedding is vector({dim}) but {encoder.model} returns {encoder.dim}; use --shadow")
+            await run_until_done(encoder, "embedding", "embedding_model", args)
+    finally:
+        await encoder.close()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shadow", action="store_true", help=f"Write to reports.{SHADOW_COLUMN} instead of embedding")
+    parser.add_argument("--swap", action="store_true", help="With --shadow: index and swap the shadow column in")
+    parser.add_argument("--service-url", default=AI_DUPLICATE_URL)
+    parser.add_argument("--batch-size", type=int, default=256, help="Rows per page, /embed_batch call and UPDATE")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds per /embed_batch call")
+    parser.add_argument("--lock-timeout-ms", type=int, default=5000)
+    parser.add_argument("--swap-attempts", type=int, default=5)
+    args = parser.parse_args()
+    if args.swap and not args.shadow:
+        parser.error("--swap needs --shadow")
+    asyncio.run(main(args))
@@ -1,48 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
-from database import get_db
-from models import User, UserRole
-from routers.auth import get_current_user
-from typing import List, Dict
+from database import get_read_db
+from models import UserRole
+from schemas import TokenData
+from routers.auth import get_token_user
+from services.hotspots import get_hotspots
+from services import rollups, status_history
+from typing import Awaitable, Callable, Optional
+from datetime import datetime, timedelta, timezone
+import json
+from utils.response_cache import response_cache, ANALYTICS_SCOPE
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
+# Longest range a single time-series request may span, per granularity
+ROLLUP_MAX_RANGE = {"hour": timedelta(days=31), "day": timedelta(days=3 * 365)}
+
+def require_admin(current_user: TokenData):
+    if current_user.role != UserRole.admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+async def cached_json(request: Request, build: Callable[[], Awaitable[dict]]) -> Response:
+    """Serve from the response cache, or build the payload and cache it."""
+    cache_key, cached = await response_cache.lookup(request, [ANALYTICS_SCOPE])
+    if cached is not None:
+        return cached
+    body = json.dumps(jsonable_encoder(await build())).encode()
+    return await response_cache.store(cache_key, request, body, cache_control="private, no-cache")
+
 @router.get("/predictive-maintenance")
 async def predictive_maintenance(
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    category: Optional[str] = None,
+    eps_m: Optional[float] = Query(None, gt=0, le=5000, description="DBSCAN neighbourhood radius in meters"),
+    min_points: Optional[int] = Query(None, ge=2, le=100, description="Minimum reports per hotspot"),
+    window_days: Optional[int] = Query(None, ge=1, le=365),
+    limit: int = Query(50, gt=0, le=500),
+    current_user: TokenData = Depends(get_token_user),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Identify hotspots for predictive maintenance.
-    Aggregates reports by location and category to find recurring issues.
+    Clusters recent reports per category with ST_ClusterDBSCAN and returns each
+    cluster's centroid, bounding polygon, size and trend. Default parameters
+    are served from the precomputed report_hotspots table; overriding them
+    clusters live.
     """
-    if current_user.role != UserRole.admin:
+    require_admin(current_user)
+
+    return await cached_json(request, lambda: get_hotspots(
+        db, category=category, eps_m=eps_m, min_points=min_points, window_days=window_days, limit=limit
+    ))
+
+
+@router.get("/summary")
+async def summary(
+    request: Request,
+    current_user: TokenData = Depends(get_token_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Dashboard totals per category, severity, department, geohash cell and
+    status, read from the daily rollups instead of scanning reports.
+    """
+    require_admin(current_user)
+    return await cached_json(request, lambda: build_summary(db))
+
+async def build_summary(db: AsyncSession) -> dict:
+    totals = await rollups.get_totals(db)
+    status_totals = totals.get(rollups.STATUS_DIMENSION, {})
+    return {
+        "total_reports": sum(totals.get("category", {}).values()),
+        "resolved_reports": status_totals.get("resolved", 0) + status_totals.get("closed", 0),
+        "open_reports": sum(
+            count for status, count in status_totals.items() if status not in ("resolved", "closed", "rejected")
+        ),
+        "totals": totals,
+    }
+
+@router.get("/rollups")
+async def rollup_series(
+    request: Request,
+    dimension: str = Query("category", pattern="^(" + "|".join(rollups.DIMENSIONS) + ")$"),
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    value: Optional[str] = None,
+    current_user: TokenData = Depends(get_token_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Report counts per bucket for one dimension. `status` rows are net flows
+    (+1 into the new status, -1 out of the old one) at transition time; the
+    other dimensions count reports by the bucket they were created in.
+    Defaults to the last 30 days (hourly: last 48 hours).
+    """
+    require_admin(current_user)
+
+    end = end or datetime.now(timezone.utc)
+    if start is None:
+        start = end - (timedelta(hours=48) if granularity == "hour" else timedelta(days=30))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if end - start > ROLLUP_MAX_RANGE[granularity]:
+        raise HTTPException(status_code=400, detail="Range too large for this granularity")
+
+    async def build():
+        series = await rollups.get_time_series(db, dimension, granularity, start, end, value=value)
+        return {"dimension": dimension, "granularity": granularity, "start": start, "end": end, "series": series}
+
+    return await cached_json(request, build)
+
+@router.get("/sla")
+async def sla_stats(
+    request: Request,
+    department_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    current_user: TokenData = Depends(get_token_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    p50/p90/p99 seconds spent in each status, plus time_to_resolve, city-wide
+    and per department/field team. Served from report_sla_stats, which is
+    recomputed from the status event log in the background.
+    """
+    if current_user.role == UserRole.citizen:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # Query to find clusters of reports (simplified for MVP)
-    # In a real app, use PostGIS ST_ClusterDBSCAN
-    query = text("""
-        SELECT 
-            category,
-            COUNT(*) as count,
-            AVG(ST_X(location::geometry)) as avg_lon,
-            AVG(ST_Y(location::geometry)) as avg_lat
-        FROM reports
-        WHERE created_at > NOW() - INTERVAL '30 days'
-        GROUP BY category
-        HAVING COUNT(*) > 2
-        ORDER BY count DESC
-    """)
-    
-    result = await db.execute(query)
-    hotspots = []
-    for row in result:
-        hotspots.append({
-            "category": row.category,
-            "report_count": row.count,
-            "location": {"lat": row.avg_lat, "lon": row.avg_lon},
-            "recommendation": f"Schedule maintenance for {row.category} in this area."
-        })
-        
-    return {"hotspots": hotspots}
+    return await cached_json(
+        request, lambda: status_history.get_sla_stats(db, department_id=department_id, team_id=team_id)
+    )
@@ -2,47 +2,116 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from datetime import timedelta
-from typing import Annotated
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Annotated, Optional
 
 from database import get_db
 from models import User, UserRole
-from schemas import UserCreate, UserResponse, Token
-from utils.security import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from schemas import UserCreate, UserResponse, Token, TokenData
+from utils.security import verify_password_async, get_password_hash_async, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, PasswordHasherBusy
 from jose import JWTError, jwt
 from utils.security import SECRET_KEY, ALGORITHM
+from utils.cache import TTLCache
+import os
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Users for the few endpoints that need more than the token claims. Entries are
+# dropped on role changes in this worker (see invalidate_user); other workers
+# keep theirs until they expire.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+user_cache = TTLCache(max_items=10000, ttl_seconds=USER_CACHE_TTL_SECONDS)
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Plain copy of a User row. Cached ORM objects would be shared across
+    sessions and requests, and touching an expired attribute or relationship
+    on one raises once its session is gone.
+    """
+    id: int
+    email: str
+    role: UserRole
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_orm(cls, user: User) -> "CachedUser":
+        return cls(id=user.id, email=user.email, role=user.role, created_at=user.created_at)
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+hasher_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many sign-in attempts in progress, please retry",
+    headers={"Retry-After": "1"},
+)
+
+def decode_token(token: str) -> TokenData:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
+        role = payload.get("role")
+        return TokenData(
+            email=email,
+            id=payload.get("uid"),
+            role=UserRole(role) if role in UserRole.__members__ else None,
+        )
     except JWTError:
         raise credentials_exception
-    
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalars().first()
-    if user is None:
+
+def invalidate_user(user_id: int):
+    user_cache.delete(user_id)
+
+async def load_user(claims: TokenData, db: AsyncSession) -> CachedUser:
+    if claims.id is not None:
+        user = user_cache.get(claims.id)
+        if user is not None:
+            return user
+        result = await db.execute(select(User).where(User.id == claims.id))
+    else:
+        # Tokens issued before user id/role claims were added
+        result = await db.execute(select(User).where(User.email == claims.email))
+    row = result.scalars().first()
+    if row is None:
         raise credentials_exception
+    user = CachedUser.from_orm(row)
+    user_cache.set(user.id, user)
     return user
 
+async def get_token_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_db)) -> TokenData:
+    """
+    Caller identity (id, email, role) straight from the signed token, with no
+    database round-trip. Use this unless the endpoint needs the User row.
+    """
+    claims = decode_token(token)
+    if claims.id is not None and claims.role is not None:
+        return claims
+    user = await load_user(claims, db)
+    return TokenData(id=user.id, email=user.email, role=user.role)
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_db)) -> CachedUser:
+    """The caller's user record, served from a short-lived cache."""
+    return await load_user(decode_token(token), db)
+
 @router.post("/register", response_model=UserResponse)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == user.email))
     if result.scalars().first():
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
     new_user = User(email=user.email, hashed_password=hashed_password)
     db.add(new_user)
     await db.commit()
@@ -54,7 +123,12 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalars().first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        password_ok = user is not None and await verify_password_async(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise hasher_busy_exception
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -63,6 +137,8 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db:
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        # id and role let most endpoints authorize without looking the user up
+        data={"sub": user.email, "uid": user.id, "role": user.role.value},
+        expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
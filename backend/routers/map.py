@@ -0,0 +1,162 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from typing import Optional
+from database import get_read_db
+from models import ReportStatus
+
+router = APIRouter(prefix="/map", tags=["map"])
+
+# Below this zoom level reports are aggregated into grid clusters
+POINTS_MIN_ZOOM = 15
+# Approximate on-screen size of a cluster cell, in 256px-tile pixels
+CLUSTER_CELL_PX = 64
+MAX_POINTS = 2000
+# Browsers and the nginx proxy may reuse responses for this long
+MAP_CACHE_SECONDS = 60
+
+def cluster_cell_degrees(zoom: int) -> float:
+    """Grid size in degrees that covers ~CLUSTER_CELL_PX pixels at this zoom."""
+    return 360.0 / (2 ** zoom * 256) * CLUSTER_CELL_PX
+
+def report_filters(category: Optional[str], status: Optional[ReportStatus], params: dict) -> str:
+    clauses = ""
+    if category:
+        clauses += " AND category = :category"
+        params["category"] = category
+    if status:
+        clauses += " AND status = :status"
+        params["status"] = status.name
+    return clauses
+
+@router.get("/clusters")
+async def get_clusters(
+    response: Response,
+    min_lon: float = Query(..., ge=-180, le=180),
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    zoom: int = Query(..., ge=0, le=22),
+    category: Optional[str] = None,
+    status: Optional[ReportStatus] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Reports inside a viewport. At low zoom they are snapped to a grid and
+    returned as clusters with counts and centroids; from POINTS_MIN_ZOOM up
+    individual points are returned.
+    """
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+
+    params = {"min_lon": min_lon, "min_lat": min_lat, "max_lon": max_lon, "max_lat": max_lat}
+    filters = report_filters(category, status, params)
+    # && against the envelope lets Postgres use the GiST index on location
+    bbox = "location && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)"
+
+    response.headers["Cache-Control"] = f"public, max-age={MAP_CACHE_SECONDS}"
+
+    if zoom < POINTS_MIN_ZOOM:
+        params["cell"] = cluster_cell_degrees(zoom)
+        query = text(f"""
+            SELECT
+                COUNT(*) AS count,
+                ST_Y(ST_Centroid(ST_Collect(location))) AS lat,
+                ST_X(ST_Centroid(ST_Collect(location))) AS lon
+            FROM reports
+            WHERE {bbox}{filters}
+            GROUP BY ST_SnapToGrid(location, :cell)
+        """)
+        result = await db.execute(query, params)
+        return {
+            "zoom": zoom,
+            "clusters": [{"lat": row.lat, "lon": row.lon, "count": row.count} for row in result],
+            "points": [],
+        }
+
+    params["limit"] = MAX_POINTS
+    query = text(f"""
+        SELECT id, title, category, status, severity,
+               ST_Y(location) AS lat, ST_X(location) AS lon
+        FROM reports
+        WHERE {bbox}{filters}
+        ORDER BY created_at DESC
+        LIMIT :limit
+    """)
+    result = await db.execute(query, params)
+    return {
+        "zoom": zoom,
+        "clusters": [],
+        "points": [
+            {
+                "id": row.id,
+                "title": row.title,
+                "category": row.category,
+                "status": row.status,
+                "severity": row.severity,
+                "lat": row.lat,
+                "lon": row.lon,
+            }
+            for row in result
+        ],
+    }
+
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+async def get_tile(
+    z: int,
+    x: int,
+    y: int,
+    category: Optional[str] = None,
+    status: Optional[ReportStatus] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Mapbox Vector Tile for one XYZ tile: a `clusters` layer below
+    POINTS_MIN_ZOOM, a `reports` layer of individual points above it.
+    """
+    if not 0 <= z <= 22 or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+
+    params = {"z": z, "x": x, "y": y}
+    filters = report_filters(category, status, params)
+
+    if z < POINTS_MIN_ZOOM:
+        params["cell"] = cluster_cell_degrees(z)
+        query = text(f"""
+            WITH bounds AS (
+                SELECT ST_TileEnvelope(:z, :x, :y) AS geom
+            ),
+            clustered AS (
+                SELECT ST_Centroid(ST_Collect(location)) AS geom, COUNT(*) AS count
+                FROM reports, bounds
+                WHERE location && ST_Transform(bounds.geom, 4326){filters}
+                GROUP BY ST_SnapToGrid(location, :cell)
+            ),
+            mvtgeom AS (
+                SELECT ST_AsMVTGeom(ST_Transform(clustered.geom, 3857), bounds.geom) AS geom, count
+                FROM clustered, bounds
+            )
+            SELECT ST_AsMVT(mvtgeom.*, 'clusters') FROM mvtgeom
+        """)
+    else:
+        query = text(f"""
+            WITH bounds AS (
+                SELECT ST_TileEnvelope(:z, :x, :y) AS geom
+            ),
+            mvtgeom AS (
+                SELECT
+                    ST_AsMVTGeom(ST_Transform(location, 3857), bounds.geom) AS geom,
+                    id, category, status::text AS status, severity::text AS severity
+                FROM reports, bounds
+                WHERE location && ST_Transform(bounds.geom, 4326){filters}
+            )
+            SELECT ST_AsMVT(mvtgeom.*, 'reports') FROM mvtgeom
+        """)
+
+    result = await db.execute(query, params)
+    tile = result.scalar() or b""
+    return Response(
+        content=bytes(tile),
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": f"public, max-age={MAP_CACHE_SECONDS}"},
+    )
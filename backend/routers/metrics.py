@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from services.enrichment import queue_stats
+from utils.ai_client import client_stats
+from routers.auth import user_cache
+from utils.security import password_hasher_stats
+from utils.response_cache import response_cache
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@router.get("/")
+async def get_metrics(db: AsyncSession = Depends(get_db)):
+    """Operational counters for the backend process."""
+    return {
+        "ai_services": client_stats(),
+        "enrichment_queue": await queue_stats(db),
+        "user_cache": user_cache.stats(),
+        "password_hashing": password_hasher_stats(),
+        "response_cache": response_cache.stats(),
+    }
@@ -1,215 +1,218 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func, tuple_
 from geoalchemy2 import WKTElement
-from geoalchemy2.shape import to_shape
 from typing import List, Optional
-import httpx
-import os
-from database import get_db
-from models import Report, User, UserRole, ReportStatus, ReportSeverity, Department, FieldTeam
-from schemas import ReportCreate, ReportResponse, ReportUpdate
-from routers.auth import get_current_user
+from pydantic import TypeAdapter
+from datetime import datetime
+import base64
+from database import get_db, get_read_db
+from models import Report, ReportStatusEvent, UserRole, ReportStatus, ReportSeverity, FieldTeam, EnrichmentStatus
+from schemas import ReportCreate, ReportResponse, ReportUpdate, DuplicateMatch, ReportStatusEventResponse, TokenData
+from routers.auth import get_token_user
+from utils.response_cache import response_cache, REPORTS_SCOPE, ANALYTICS_SCOPE, report_scope
+from services import enrichment, rollups, status_history
+from services.duplicates import find_duplicates_of_report, DUPLICATE_RADIUS_M, DUPLICATE_WINDOW_DAYS, DUPLICATE_MIN_SCORE, DUPLICATE_LIMIT
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
-# AI Service URLs
-AI_DUPLICATE_URL = os.getenv("AI_DUPLICATE_URL", "http://ai-duplicate:9001")
-
-async def auto_assign_department(category: str, db: AsyncSession) -> Optional[int]:
-    """Map category to department."""
-    # Simple mapping for MVP
-    mapping = {
-        "pothole": "Roads",
-        "street_light": "Electrical",
-        "garbage": "Sanitation",
-        "flooding": "Drainage",
-        "graffiti": "Sanitation"
-    }
-    dept_name = mapping.get(category)
-    if dept_name:
-        result = await db.execute(select(Department).where(Department.name == dept_name))
-        dept = result.scalars().first()
-        if dept:
-            return dept.id
-    return None
-
-async def predict_severity(text: str) -> ReportSeverity:
-    """Predict severity using AI service."""
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{AI_DUPLICATE_URL}/predict_severity",
-                json={"text": text},
-                timeout=5.0
-            )
-            if response.status_code == 200:
-                result = response.json()
-                severity_str = result['severity']
-                # Map string to enum
-                if severity_str in ReportSeverity.__members__:
-                    return ReportSeverity[severity_str]
-    except Exception as e:
-        print(f"Severity prediction failed: {e}")
-
-    # Fallback logic
-    text_lower = text.lower()
-    if "danger" in text_lower or "accident" in text_lower or "huge" in text_lower:
-        return ReportSeverity.critical
-    if "urgent" in text_lower:
-        return ReportSeverity.high
-    return ReportSeverity.medium
-
 @router.post("/", response_model=ReportResponse)
 async def create_report(
     report: ReportCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_token_user),
     db: AsyncSession = Depends(get_db)
 ):
     # Create WKT point from lat/lon
     # Note: PostGIS uses (lon, lat) order for points
     location_wkt = f"POINT({report.longitude} {report.latitude})"
-    
-    # Auto-predict category if not provided or is generic
-    predicted_category = report.category
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{AI_DUPLICATE_URL}/predict_category",
-                json={"text": f"{report.title}. {report.description}"},
-                timeout=10.0
-            )
-            if response.status_code == 200:
-                result = response.json()
-                if result['confidence'] > 0.6:  # Only use if confident
-                    predicted_category = result['category']
-    except Exception as e:
-        print(f"Category prediction failed: {e}")
-    
-
-    
-    # Auto-assign Department
-    department_id = await auto_assign_department(predicted_category, db)
-    
-    # Predict Severity
-    severity = await predict_severity(f"{report.title}. {report.description}")
 
+    # Category, severity, department and embedding are filled in by the
+    # enrichment worker, so submission is a single DB write
     new_report = Report(
         title=report.title,
         description=report.description,
-        category=predicted_category,
-        severity=severity,
+        category=report.category,
         status=ReportStatus.pending,
+        enrichment_status=EnrichmentStatus.pending,
         image_url=report.image_url,
         location=WKTElement(location_wkt, srid=4326),
         user_id=current_user.id,
-        department_id=department_id
     )
-    
-    # TODO: Trigger AI duplicate check here (async task or direct call)
-    # For now, we'll add it as a synchronous call for MVP
-    try:
-        async with httpx.AsyncClient() as client:
-            # Get embedding for the new report
-            embed_response = await client.post(
-                f"{AI_DUPLICATE_URL}/embed",
-                json={"text": f"{report.title}. {report.description}"},
-                timeout=10.0
-            )
-            if embed_response.status_code == 200:
-                embedding = embed_response.json()["embedding"]
-                new_report.embedding = embedding
-    except Exception as e:
-        print(f"Embedding generation failed: {e}")
-    
     db.add(new_report)
+    await db.flush()
+    await enrichment.enqueue(db, new_report.id)
+    # After the flush, so severity holds its column default like enrichment will see it
+    dimensions = rollups.report_dimensions(new_report)
+    dimensions["geohash"] = rollups.geohash_encode(report.latitude, report.longitude)
+    await rollups.record_report_created(db, dimensions, ReportStatus.pending)
+    await status_history.record_transition(db, new_report.id, None, ReportStatus.pending, current_user.id)
     await db.commit()
     await db.refresh(new_report)
+    new_report.latitude = report.latitude
+    new_report.longitude = report.longitude
+
+    enrichment.notify()
+    await response_cache.invalidate(REPORTS_SCOPE, ANALYTICS_SCOPE)
     return new_report
 
+# Only the columns ReportResponse needs; lat/lon come from PostGIS, not to_shape
+REPORT_RESPONSE_COLUMNS = [
+    Report.id,
+    Report.title,
+    Report.description,
+    Report.category,
+    Report.status,
+    Report.severity,
+    Report.image_url,
+    Report.upvotes,
+    Report.created_at,
+    Report.user_id,
+    Report.department_id,
+    Report.assigned_team_id,
+    Report.resolution_image_url,
+    Report.citizen_feedback,
+    Report.enrichment_status,
+    func.coalesce(func.ST_Y(Report.location), 0.0).label("latitude"),
+    func.coalesce(func.ST_X(Report.location), 0.0).label("longitude"),
+]
+
+report_list_adapter = TypeAdapter(List[ReportResponse])
+
+REPORTS_PAGE_SIZE = 50
+REPORTS_MAX_PAGE_SIZE = 200
+
+def encode_cursor(created_at: datetime, report_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{report_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, report_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(report_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/", response_model=List[ReportResponse])
 async def get_reports(
+    request: Request,
     lat: Optional[float] = None,
     lon: Optional[float] = None,
     radius: Optional[float] = Query(None, description="Radius in meters"),
     category: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    status: Optional[ReportStatus] = None,
+    severity: Optional[ReportSeverity] = None,
+    department_id: Optional[int] = None,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(REPORTS_PAGE_SIZE, gt=0, le=REPORTS_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = select(Report)
+    """
+    Newest reports first, one page at a time. When more rows exist the
+    response carries an X-Next-Cursor header to pass back as `cursor`.
+    """
+    cache_key, cached = await response_cache.lookup(request, [REPORTS_SCOPE])
+    if cached is not None:
+        return cached
+
+    query = select(*REPORT_RESPONSE_COLUMNS)
     
     if category:
         query = query.where(Report.category == category)
+    if status:
+        query = query.where(Report.status == status)
+    if severity:
+        query = query.where(Report.severity == severity)
+    if department_id is not None:
+        query = query.where(Report.department_id == department_id)
         
     if lat is not None and lon is not None and radius is not None:
-        # ST_DWithin takes geometry, geometry, distance_in_meters (if using geography type or appropriate projection)
-        # Since we used Geometry(POINT, 4326), the unit is degrees. 
-        # To use meters, we should cast to Geography or use ST_DistanceSphere (deprecated) or ST_DWithin with geography cast.
-        # Best practice: cast to geography for meter-based distance.
-        pt = WKTElement(f"POINT({lon} {lat})", srid=4326)
+        # Meter-based distance on geography(location), backed by a functional GiST index
         query = query.where(
             func.ST_DWithin(
-                Report.location.cast(func.geography),
+                func.geography(Report.location),
                 func.ST_GeogFromText(f"SRID=4326;POINT({lon} {lat})"),
                 radius
             )
         )
-    
+
+    if cursor:
+        # Keyset pagination: continue strictly after the last row of the previous page
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Report.created_at, Report.id) < tuple_(cursor_created_at, cursor_id))
+
+    # Fetch one extra row to know whether another page exists
+    query = query.order_by(Report.created_at.desc(), Report.id.desc()).limit(limit + 1)
     result = await db.execute(query)
-    reports = result.scalars().all()
-    
-    # Convert WKT/Geometry to lat/lon for response
-    # This is a bit manual, ideally we use a serializer or property
-    # For MVP, we'll just let Pydantic handle it if we map it correctly, 
-    # but the ReportResponse expects lat/lon which are not on the model.
-    # We need to patch the response objects.
-    
-    response_reports = []
-    for r in reports:
-        # Extract lat/lon from WKT or use ST_X/ST_Y in query
-        # For simplicity, we'll just return the object and let the frontend parse WKT if needed,
-        # OR we can update the query to return lat/lon columns.
-        # Let's update the query to fetch lat/lon explicitly if we want to be clean,
-        # but for now let's just assume the frontend can handle it or we add properties to the model.
-        
-        # Use to_shape to parse WKBElement
-        if r.location is not None:
-            point = to_shape(r.location)
-            r.latitude = point.y
-            r.longitude = point.x
-        else:
-            r.latitude = 0.0
-            r.longitude = 0.0
-        
-        response_reports.append(r)
+    rows = [dict(row._mapping) for row in result]
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["id"])
 
-    return response_reports
+    # dump_json alone would serialize the raw dicts, skipping ReportResponse's fields and validators
+    body = report_list_adapter.dump_json(report_list_adapter.validate_python(rows))
+    return await response_cache.store(cache_key, request, body, headers)
 
 @router.get("/{report_id}", response_model=ReportResponse)
-async def get_report(report_id: int, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Report).where(Report.id == report_id))
-    report = result.scalars().first()
-    if not report:
+async def get_report(report_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    cache_key, cached = await response_cache.lookup(request, [report_scope(report_id)])
+    if cached is not None:
+        return cached
+
+    result = await db.execute(select(*REPORT_RESPONSE_COLUMNS).where(Report.id == report_id))
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Report not found")
-    
-    if report.location is not None:
-        point = to_shape(report.location)
-        report.latitude = point.y
-        report.longitude = point.x
-    else:
-        report.latitude = 0.0
-        report.longitude = 0.0
-    return report
+
+    report = ReportResponse.model_validate(dict(row._mapping))
+    return await response_cache.store(cache_key, request, report.model_dump_json().encode())
+
+@router.get("/{report_id}/duplicates", response_model=List[DuplicateMatch])
+async def get_report_duplicates(
+    report_id: int,
+    radius: float = Query(DUPLICATE_RADIUS_M, gt=0, description="Radius in meters"),
+    days: int = Query(DUPLICATE_WINDOW_DAYS, gt=0, description="Only reports from the last N days"),
+    min_score: float = Query(DUPLICATE_MIN_SCORE, ge=0, le=1),
+    limit: int = Query(DUPLICATE_LIMIT, gt=0, le=50),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Near-duplicate reports found by embedding similarity inside Postgres."""
+    result = await db.execute(select(Report.id).where(Report.id == report_id))
+    if result.scalar() is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return await find_duplicates_of_report(
+        db, report_id, radius_m=radius, window_days=days, min_score=min_score, limit=limit
+    )
+
+@router.get("/{report_id}/history", response_model=List[ReportStatusEventResponse])
+async def get_report_history(report_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Status transitions of one report, oldest first."""
+    result = await db.execute(
+        select(ReportStatusEvent)
+        .where(ReportStatusEvent.report_id == report_id)
+        .order_by(ReportStatusEvent.created_at, ReportStatusEvent.id)
+    )
+    events = result.scalars().all()
+    if not events:
+        result = await db.execute(select(Report.id).where(Report.id == report_id))
+        if result.scalar() is None:
+            raise HTTPException(status_code=404, detail="Report not found")
+    return events
 
 @router.post("/{report_id}/verify", response_model=ReportResponse)
 async def verify_report(
     report_id: int,
     feedback: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_token_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Citizen verifies the resolution."""
-    result = await db.execute(select(Report).where(Report.id == report_id))
+    # Row lock so the status rollup delta matches the status actually replaced
+    result = await db.execute(select(Report).where(Report.id == report_id).with_for_update())
     report = result.scalars().first()
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
@@ -220,21 +223,25 @@ async def verify_report(
     if report.status != ReportStatus.resolved:
         raise HTTPException(status_code=400, detail="Report is not in resolved state")
 
+    await rollups.record_status_change(db, report.status, ReportStatus.closed)
+    await status_history.record_transition(db, report.id, report.status, ReportStatus.closed, current_user.id)
     report.status = ReportStatus.closed
     report.citizen_feedback = feedback
     await db.commit()
     await db.refresh(report)
+    await response_cache.invalidate(REPORTS_SCOPE, report_scope(report.id), ANALYTICS_SCOPE)
     return report
 
 @router.post("/{report_id}/reopen", response_model=ReportResponse)
 async def reopen_report(
     report_id: int,
     feedback: str,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_token_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Citizen rejects resolution and reopens report."""
-    result = await db.execute(select(Report).where(Report.id == report_id))
+    # Row lock so the status rollup delta matches the status actually replaced
+    result = await db.execute(select(Report).where(Report.id == report_id).with_for_update())
     report = result.scalars().first()
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
@@ -242,8 +249,11 @@ async def reopen_report(
     if report.user_id != current_user.id and current_user.role != UserRole.admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    await rollups.record_status_change(db, report.status, ReportStatus.reopened)
+    await status_history.record_transition(db, report.id, report.status, ReportStatus.reopened, current_user.id)
     report.status = ReportStatus.reopened
     report.citizen_feedback = feedback
     await db.commit()
     await db.refresh(report)
+    await response_cache.invalidate(REPORTS_SCOPE, report_scope(report.id), ANALYTICS_SCOPE)
     return report
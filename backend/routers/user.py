@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from database import get_db
+from models import User, UserRole
+from schemas import UserResponse, UserRoleUpdate, TokenData
+from routers.auth import CachedUser, get_current_user, get_token_user, invalidate_user
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+@router.get("/me", response_model=UserResponse)
+async def read_me(current_user: CachedUser = Depends(get_current_user)):
+    return current_user
+
+@router.patch("/{user_id}/role", response_model=UserResponse)
+async def update_role(
+    user_id: int,
+    update: UserRoleUpdate,
+    current_user: TokenData = Depends(get_token_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Change a user's role. This worker's cached copy of the user is dropped
+    immediately; other workers may serve the old role from their caches for
+    up to USER_CACHE_TTL_SECONDS. Role claims in already-issued tokens stay
+    valid until the token expires.
+    """
+    if current_user.role != UserRole.admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user.role = update.role
+    await db.commit()
+    await db.refresh(user)
+    invalidate_user(user_id)
+    return user
@@ -1,90 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from database import get_db
-from models import Vote, Report, User
-from routers.auth import get_current_user
+from schemas import BulkVoteRequest, BulkVoteResponse, TokenData
+from routers.auth import get_token_user
+from services.votes import cast_vote, set_votes
+from utils.response_cache import response_cache, REPORTS_SCOPE, report_scope
 
 router = APIRouter(prefix="/reports", tags=["votes"])
 
+async def record_vote(report_id: int, value: int, user: TokenData, db: AsyncSession) -> dict:
+    upvotes = await cast_vote(db, user.id, report_id, value)
+    if upvotes is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Report not found")
+    await db.commit()
+    await response_cache.invalidate(REPORTS_SCOPE, report_scope(report_id))
+    return {"message": "Vote recorded", "upvotes": upvotes}
+
+@router.post("/votes/batch", response_model=BulkVoteResponse)
+async def batch_votes(
+    request: BulkVoteRequest,
+    current_user: TokenData = Depends(get_token_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply queued votes in one transaction, e.g. when a mobile client comes
+    back online. Each value is the final vote state for that report, so
+    retrying a batch is safe.
+    """
+    results = await set_votes(db, current_user.id, [(v.report_id, v.value) for v in request.votes])
+    await db.commit()
+    await response_cache.invalidate(
+        REPORTS_SCOPE, *(report_scope(r["report_id"]) for r in results if r["status"] == "applied")
+    )
+    return {"results": results}
+
 @router.post("/{report_id}/upvote")
 async def upvote_report(
     report_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_token_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Upvote a report. Creates or updates vote."""
-    # Check if report exists
-    result = await db.execute(select(Report).where(Report.id == report_id))
-    report = result.scalars().first()
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    # Check if user already voted
-    vote_result = await db.execute(
-        select(Vote).where(
-            Vote.user_id == current_user.id,
-            Vote.report_id == report_id
-        )
-    )
-    existing_vote = vote_result.scalars().first()
-    
-    if existing_vote:
-        if existing_vote.value == 1:
-            # Already upvoted, remove vote
-            await db.delete(existing_vote)
-            report.upvotes = max(0, report.upvotes - 1)
-        else:
-            # Was downvote, change to upvote
-            existing_vote.value = 1
-            report.upvotes += 1
-    else:
-        # New upvote
-        new_vote = Vote(user_id=current_user.id, report_id=report_id, value=1)
-        db.add(new_vote)
-        report.upvotes += 1
-    
-    await db.commit()
-    await db.refresh(report)
-    
-    return {"message": "Vote recorded", "upvotes": report.upvotes}
+    """Upvote a report. Upvoting again removes the vote."""
+    return await record_vote(report_id, 1, current_user, db)
 
 @router.post("/{report_id}/downvote")
 async def downvote_report(
     report_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_token_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Downvote a report. Creates or updates vote."""
-    # Check if report exists
-    result = await db.execute(select(Report).where(Report.id == report_id))
-    report = result.scalars().first()
-    if not report:
-        raise HTTPException(status_code=404, detail="Report not found")
-    
-    # Check if user already voted
-    vote_result = await db.execute(
-        select(Vote).where(
-            Vote.user_id == current_user.id,
-            Vote.report_id == report_id
-        )
-    )
-    existing_vote = vote_result.scalars().first()
-    
-    if existing_vote:
-        if existing_vote.value == -1:
-            # Already downvoted, remove vote
-            await db.delete(existing_vote)
-        else:
-            # Was upvote, change to downvote
-            existing_vote.value = -1
-            report.upvotes = max(0, report.upvotes - 1)
-    else:
-        # New downvote (doesn't affect upvote count)
-        new_vote = Vote(user_id=current_user.id, report_id=report_id, value=-1)
-        db.add(new_vote)
-    
-    await db.commit()
-    await db.refresh(report)
-    
-    return {"message": "Vote recorded", "upvotes": report.upvotes}
+    """Downvote a report. Downvoting again removes the vote."""
+    return await record_vote(report_id, -1, current_user, db)
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional, List
 from datetime import datetime
-from models import UserRole, ReportStatus, ReportSeverity
+from models import UserRole, ReportStatus, ReportSeverity, EnrichmentStatus
 
 # User Schemas
 class UserBase(BaseModel):
@@ -18,6 +18,9 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class UserRoleUpdate(BaseModel):
+    role: UserRole
+
 # Token Schemas
 class Token(BaseModel):
     access_token: str
@@ -25,6 +28,8 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    id: Optional[int] = None
+    role: Optional[UserRole] = None
 
 # Department & Team Schemas
 class DepartmentResponse(BaseModel):
@@ -69,6 +74,7 @@ class ReportResponse(ReportBase):
     assigned_team_id: Optional[int]
     resolution_image_url: Optional[str]
     citizen_feedback: Optional[str]
+    enrichment_status: Optional[EnrichmentStatus] = None
     
     class Config:
         from_attributes = True
@@ -81,3 +87,38 @@ class ReportUpdate(BaseModel):
     resolution_image_url: Optional[str] = None
     citizen_feedback: Optional[str] = None
     assigned_team_id: Optional[int] = None
+
+class DuplicateMatch(BaseModel):
+    id: int
+    title: str
+    category: Optional[str]
+    status: ReportStatus
+    created_at: datetime
+    score: float
+    distance_m: float
+
+class ReportStatusEventResponse(BaseModel):
+    from_status: Optional[ReportStatus]
+    to_status: ReportStatus
+    changed_by: Optional[int]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Vote Schemas
+class BulkVoteItem(BaseModel):
+    report_id: int
+    value: int = Field(..., ge=-1, le=1, description="1 upvote, -1 downvote, 0 remove vote")
+
+class BulkVoteRequest(BaseModel):
+    votes: List[BulkVoteItem] = Field(..., min_length=1, max_length=500)
+
+class BulkVoteResult(BaseModel):
+    report_id: int
+    value: int
+    status: str  # applied, not_found
+    upvotes: Optional[int]
+
+class BulkVoteResponse(BaseModel):
+    results: List[BulkVoteResult]
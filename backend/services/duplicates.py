@@ -0,0 +1,90 @@
+from datetime import timedelta
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func
+import os
+from models import Report
+
+# Defaults for what counts as a duplicate
+DUPLICATE_RADIUS_M = float(os.getenv("DUPLICATE_RADIUS_M", 200))
+DUPLICATE_WINDOW_DAYS = int(os.getenv("DUPLICATE_WINDOW_DAYS", 30))
+DUPLICATE_MIN_SCORE = float(os.getenv("DUPLICATE_MIN_SCORE", 0.6))
+DUPLICATE_LIMIT = int(os.getenv("DUPLICATE_LIMIT", 10))
+
+async def find_similar_reports(
+    db: AsyncSession,
+    embedding,
+    location,
+    embedding_model,
+    radius_m: float = DUPLICATE_RADIUS_M,
+    window_days: int = DUPLICATE_WINDOW_DAYS,
+    min_score: float = DUPLICATE_MIN_SCORE,
+    limit: int = DUPLICATE_LIMIT,
+    exclude_id: Optional[int] = None,
+) -> List[dict]:
+    """
+    Nearest reports by cosine similarity within `radius_m` metres of `location`
+    and created in the last `window_days`, in a single query.
+
+    `embedding` is a list of floats or a SQL expression yielding a vector;
+    `location` is a geography expression.
+
+    The radius and window are applied first, through the GiST index on
+    geography(location), and that small candidate set is ranked exactly.
+    Ranking through the HNSW index instead would post-filter its first
+    hnsw.ef_search (default 40) neighbours from the whole table. In a large
+    city those are mostly far away, so real duplicates would be missed.
+
+    `embedding_model` is the model version that produced `embedding` (or a SQL
+    expression for it). Only reports embedded by the same model are compared,
+    since vectors from different models are not comparable, e.g. during an
+    in-place reembed_reports.py run.
+    """
+    nearby = (
+        select(
+            Report.id,
+            Report.title,
+            Report.category,
+            Report.status,
+            Report.created_at,
+            Report.embedding,
+            func.ST_Distance(func.geography(Report.location), location).label("distance_m"),
+        )
+        .where(Report.embedding.isnot(None))
+        .where(Report.embedding_model.is_not_distinct_from(embedding_model))
+        .where(func.ST_DWithin(func.geography(Report.location), location, radius_m))
+        .where(Report.created_at >= func.now() - timedelta(days=window_days))
+    )
+    if exclude_id is not None:
+        nearby = nearby.where(Report.id != exclude_id)
+    # MATERIALIZED keeps the planner from folding the filters back into an ANN scan
+    nearby = nearby.cte("nearby").prefix_with("MATERIALIZED")
+
+    distance = nearby.c.embedding.cosine_distance(embedding)
+    query = (
+        select(
+            nearby.c.id,
+            nearby.c.title,
+            nearby.c.category,
+            nearby.c.status,
+            nearby.c.created_at,
+            (1 - distance).label("score"),
+            nearby.c.distance_m,
+        )
+        .where(distance <= 1 - min_score)
+        .order_by(distance)
+        .limit(limit)
+    )
+
+    result = await db.execute(query)
+    return [dict(row._mapping) for row in result]
+
+async def find_duplicates_of_report(db: AsyncSession, report_id: int, **kwargs) -> List[dict]:
+    """Duplicates of an existing report, using its stored embedding and location."""
+    # Scalar subqueries keep this a single round-trip and let the planner treat
+    # the target embedding and location as constants
+    embedding = select(Report.embedding).where(Report.id == report_id).scalar_subquery()
+    location = select(func.geography(Report.location)).where(Report.id == report_id).scalar_subquery()
+    embedding_model = select(Report.embedding_model).where(Report.id == report_id).scalar_subquery()
+    return await find_similar_reports(db, embedding, location, embedding_model, exclude_id=report_id, **kwargs)
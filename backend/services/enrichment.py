@@ -0,0 +1,210 @@
+import asyncio
+from datetime import timedelta
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, delete
+import os
+from database import AsyncSessionLocal
+from models import Report, ReportSeverity, Department, EnrichmentJob, EnrichmentStatus
+from utils.ai_client import ai_duplicate, CircuitOpen
+from services import rollups
+from utils.response_cache import response_cache, REPORTS_SCOPE, ANALYTICS_SCOPE, report_scope
+
+ENRICHMENT_WORKERS = int(os.getenv("ENRICHMENT_WORKERS", 1))
+ENRICHMENT_BATCH_SIZE = int(os.getenv("ENRICHMENT_BATCH_SIZE", 16))
+ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("ENRICHMENT_MAX_ATTEMPTS", 5))
+ENRICHMENT_BACKOFF_SECONDS = float(os.getenv("ENRICHMENT_BACKOFF_SECONDS", 2.0))
+ENRICHMENT_POLL_SECONDS = float(os.getenv("ENRICHMENT_POLL_SECONDS", 5.0))
+# A claimed job is retried by any worker if not settled within this long
+ENRICHMENT_LEASE_SECONDS = float(os.getenv("ENRICHMENT_LEASE_SECONDS", 120.0))
+
+# Set by create_report so a local worker picks the job up without waiting for the next poll
+_wakeup = asyncio.Event()
+_workers: List[asyncio.Task] = []
+
+async def auto_assign_department(category: str, db: AsyncSession) -> Optional[int]:
+    """Map category to department."""
+    # Simple mapping for MVP
+    mapping = {
+        "pothole": "Roads",
+        "street_light": "Electrical",
+        "garbage": "Sanitation",
+        "flooding": "Drainage",
+        "graffiti": "Sanitation"
+    }
+    dept_name = mapping.get(category)
+    if dept_name:
+        result = await db.execute(select(Department).where(Department.name == dept_name))
+        dept = result.scalars().first()
+        if dept:
+            return dept.id
+    return None
+
+async def analyze_report_text(text: str) -> dict:
+    """Get category, severity and embedding from the AI service in one round-trip."""
+    return await ai_duplicate.post("/analyze", {"text": text})
+
+def predict_severity(text: str, analysis: Optional[dict] = None) -> ReportSeverity:
+    """Severity from the AI analysis, falling back to keywords."""
+    if analysis:
+        severity_str = analysis.get('severity')
+        # Map string to enum
+        if severity_str in ReportSeverity.__members__:
+            return ReportSeverity[severity_str]
+
+    # Fallback logic
+    text_lower = text.lower()
+    if "danger" in text_lower or "accident" in text_lower or "huge" in text_lower:
+        return ReportSeverity.critical
+    if "urgent" in text_lower:
+        return ReportSeverity.high
+    return ReportSeverity.medium
+
+def report_text(report: Report) -> str:
+    return f"{report.title}. {report.description}"
+
+async def apply_analysis(db: AsyncSession, report: Report, analysis: Optional[dict]):
+    """Fill in AI-derived fields. With no analysis, only the keyword fallbacks apply."""
+    before = rollups.report_dimensions(report)
+    # Auto-predict category if confident, otherwise keep the citizen's choice
+    if analysis and analysis.get('category') and analysis['category_confidence'] > 0.6:
+        report.category = analysis['category']
+
+    report.department_id = await auto_assign_department(report.category, db)
+    report.severity = predict_severity(report_text(report), analysis)
+
+    if analysis:
+        report.embedding = analysis["embedding"]
+        report.embedding_model = analysis.get("model")
+        report.enrichment_status = EnrichmentStatus.complete
+    else:
+        report.enrichment_status = EnrichmentStatus.failed
+
+    after = rollups.report_dimensions(report)
+    await rollups.record_report_changed(db, report.created_at, before, after)
+
+async def enqueue(db: AsyncSession, report_id: int):
+    """Add an enrichment job in the caller's transaction."""
+    db.add(EnrichmentJob(report_id=report_id))
+
+def notify():
+    _wakeup.set()
+
+async def claim_jobs() -> List[tuple]:
+    """
+    Lease up to ENRICHMENT_BATCH_SIZE due jobs in a short transaction.
+    Returns (job_id, report_id, text) tuples. A leased job counts as an attempt
+    and is only picked up again if its worker doesn't settle it within the lease.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(EnrichmentJob, Report)
+            .join(Report, Report.id == EnrichmentJob.report_id)
+            .where(EnrichmentJob.run_after <= func.now())
+            .order_by(EnrichmentJob.run_after)
+            .limit(ENRICHMENT_BATCH_SIZE)
+            .with_for_update(of=EnrichmentJob, skip_locked=True)
+        )
+        claimed = [(job, report) for job, report in result.all()]
+        for job, _ in claimed:
+            job.attempts += 1
+            job.run_after = func.now() + timedelta(seconds=ENRICHMENT_LEASE_SECONDS)
+        leased = [(job.id, report.id, report_text(report)) for job, report in claimed]
+        await db.commit()
+    return leased
+
+async def process_batch() -> int:
+    """Claim up to ENRICHMENT_BATCH_SIZE due jobs and enrich them. Returns jobs claimed."""
+    leased = await claim_jobs()
+    if not leased:
+        return 0
+
+    # Outside any transaction: no row locks or pooled connection held while waiting.
+    # Concurrent calls land in the same ai-duplicate micro-batch.
+    analyses = await asyncio.gather(
+        *(analyze_report_text(text) for _, _, text in leased),
+        return_exceptions=True,
+    )
+    outcomes = {job_id: analysis for (job_id, _, _), analysis in zip(leased, analyses)}
+
+    done_ids = []
+    enriched_ids = []
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(EnrichmentJob, Report)
+            .join(Report, Report.id == EnrichmentJob.report_id)
+            .where(EnrichmentJob.id.in_(list(outcomes)))
+            .with_for_update(of=EnrichmentJob)
+        )
+        # Jobs missing here were settled by another worker after our lease ran out
+        for job, report in result.all():
+            analysis = outcomes[job.id]
+            if not isinstance(analysis, Exception):
+                await apply_analysis(db, report, analysis)
+                done_ids.append(job.id)
+                enriched_ids.append(report.id)
+                continue
+
+            job.last_error = str(analysis)
+            if isinstance(analysis, CircuitOpen):
+                # Never tried, so it doesn't use up an attempt; an outage longer than
+                # the backoff schedule must not fail every queued report
+                job.attempts -= 1
+                delay = max(analysis.retry_after, ENRICHMENT_BACKOFF_SECONDS)
+                job.run_after = func.now() + timedelta(seconds=delay)
+            elif job.attempts >= ENRICHMENT_MAX_ATTEMPTS:
+                print(f"Enrichment of report {report.id} gave up: {analysis}")
+                await apply_analysis(db, report, None)
+                done_ids.append(job.id)
+                enriched_ids.append(report.id)
+            else:
+                backoff = ENRICHMENT_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+                job.run_after = func.now() + timedelta(seconds=backoff)
+
+        if done_ids:
+            await db.execute(delete(EnrichmentJob).where(EnrichmentJob.id.in_(done_ids)))
+        await db.commit()
+    if enriched_ids:
+        await response_cache.invalidate(
+            REPORTS_SCOPE, ANALYTICS_SCOPE, *(report_scope(report_id) for report_id in enriched_ids)
+        )
+    return len(leased)
+
+async def run_worker():
+    while True:
+        try:
+            claimed = await process_batch()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Enrichment worker error: {e}")
+            claimed = 0
+
+        if claimed == 0:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), ENRICHMENT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+def start_workers():
+    for _ in range(ENRICHMENT_WORKERS):
+        _workers.append(asyncio.create_task(run_worker()))
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+async def queue_stats(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(
+            func.count(EnrichmentJob.id),
+            func.count(EnrichmentJob.id).filter(EnrichmentJob.last_error.isnot(None)),
+            func.min(EnrichmentJob.created_at),
+        )
+    )
+    depth, retrying, oldest = result.one()
+    return {"depth": depth, "retrying": retrying, "oldest_job_at": oldest}
@@ -0,0 +1,235 @@
+import asyncio
+import json
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import os
+from database import AsyncSessionLocal
+from utils.response_cache import response_cache, ANALYTICS_SCOPE
+
+# Defaults used for the precomputed report_hotspots table. Requests asking
+# for other parameters are clustered live instead.
+HOTSPOT_EPS_M = float(os.getenv("HOTSPOT_EPS_M", 150))
+HOTSPOT_MIN_POINTS = int(os.getenv("HOTSPOT_MIN_POINTS", 3))
+HOTSPOT_WINDOW_DAYS = int(os.getenv("HOTSPOT_WINDOW_DAYS", 30))
+HOTSPOT_TREND_DAYS = int(os.getenv("HOTSPOT_TREND_DAYS", 7))
+HOTSPOT_REFRESH_SECONDS = float(os.getenv("HOTSPOT_REFRESH_SECONDS", 300))
+# Reports age out of the window without any write, so recluster everything this often
+HOTSPOT_FULL_REFRESH_HOURS = float(os.getenv("HOTSPOT_FULL_REFRESH_HOURS", 6))
+
+# pg advisory lock key so only one worker refreshes at a time
+HOTSPOT_LOCK_KEY = 716_001
+
+_refresher: Optional[asyncio.Task] = None
+
+def _cluster_sql(category_filter: str = "") -> str:
+    """DBSCAN over recent reports, one row per (category, cluster)."""
+    return f"""
+        WITH windowed AS (
+            SELECT category, location, created_at
+            FROM reports
+            WHERE created_at > NOW() - make_interval(days => CAST(:window_days AS INTEGER))
+              AND location IS NOT NULL{category_filter}
+        ),
+        scale AS (
+            -- Web Mercator stretches distances by 1/cos(latitude)
+            SELECT 1 / COS(RADIANS(COALESCE(AVG(ST_Y(location)), 0))) AS k FROM windowed
+        ),
+        clustered AS (
+            SELECT category, location, created_at,
+                   ST_ClusterDBSCAN(
+                       ST_Transform(location, 3857),
+                       eps := CAST(:eps_m AS DOUBLE PRECISION) * (SELECT k FROM scale),
+                       minpoints := CAST(:min_points AS INTEGER)
+                   ) OVER (PARTITION BY category) AS cluster_id
+            FROM windowed
+        )
+        SELECT
+            category,
+            cluster_id,
+            COUNT(*) AS report_count,
+            COUNT(*) FILTER (
+                WHERE created_at > NOW() - make_interval(days => CAST(:trend_days AS INTEGER))
+            ) AS recent_count,
+            COUNT(*) FILTER (
+                WHERE created_at <= NOW() - make_interval(days => CAST(:trend_days AS INTEGER))
+                  AND created_at > NOW() - make_interval(days => 2 * CAST(:trend_days AS INTEGER))
+            ) AS previous_count,
+            ST_Centroid(ST_Collect(location)) AS centroid,
+            ST_ConvexHull(ST_Collect(location)) AS bounds,
+            MIN(created_at) AS first_reported_at,
+            MAX(created_at) AS last_reported_at
+        FROM clustered
+        WHERE cluster_id IS NOT NULL
+        GROUP BY category, cluster_id
+    """
+
+def _params(eps_m: float, min_points: int, window_days: int) -> dict:
+    return {
+        "eps_m": eps_m,
+        "min_points": min_points,
+        "window_days": window_days,
+        "trend_days": HOTSPOT_TREND_DAYS,
+    }
+
+def _signature() -> str:
+    return f"{HOTSPOT_EPS_M}:{HOTSPOT_MIN_POINTS}:{HOTSPOT_WINDOW_DAYS}:{HOTSPOT_TREND_DAYS}"
+
+def _trend(recent: int, previous: int) -> dict:
+    ratio = (recent - previous) / max(previous, 1)
+    label = "rising" if ratio > 0.25 else "falling" if ratio < -0.25 else "stable"
+    return {"label": label, "recent_count": recent, "previous_count": previous, "change_ratio": ratio}
+
+def _hotspot(row) -> dict:
+    return {
+        "category": row.category,
+        "report_count": row.report_count,
+        "location": {"lat": row.lat, "lon": row.lon},
+        "bounds": json.loads(row.bounds) if row.bounds else None,
+        "trend": _trend(row.recent_count, row.previous_count),
+        "first_reported_at": row.first_reported_at,
+        "last_reported_at": row.last_reported_at,
+        "recommendation": f"Schedule maintenance for {row.category} in this area.",
+    }
+
+_OUTPUT_COLUMNS = """
+    category, report_count, recent_count, previous_count,
+    ST_Y(centroid) AS lat, ST_X(centroid) AS lon, ST_AsGeoJSON(bounds) AS bounds,
+    first_reported_at, last_reported_at
+"""
+
+async def get_hotspots(
+    db: AsyncSession,
+    category: Optional[str] = None,
+    eps_m: Optional[float] = None,
+    min_points: Optional[int] = None,
+    window_days: Optional[int] = None,
+    limit: int = 50,
+) -> dict:
+    """
+    Hotspots from the precomputed table, or clustered live when the caller
+    overrides eps/min_points/window.
+    """
+    eps_m = HOTSPOT_EPS_M if eps_m is None else eps_m
+    min_points = HOTSPOT_MIN_POINTS if min_points is None else min_points
+    window_days = HOTSPOT_WINDOW_DAYS if window_days is None else window_days
+    live = (eps_m, min_points, window_days) != (HOTSPOT_EPS_M, HOTSPOT_MIN_POINTS, HOTSPOT_WINDOW_DAYS)
+
+    params = {"limit": limit}
+    if live:
+        params.update(_params(eps_m, min_points, window_days))
+        category_filter = ""
+        if category:
+            category_filter = " AND category = :category"
+            params["category"] = category
+        query = text(f"""
+            SELECT {_OUTPUT_COLUMNS}
+            FROM ({_cluster_sql(category_filter)}) AS hotspots
+            ORDER BY report_count DESC
+            LIMIT :limit
+        """)
+        refreshed_at = None
+    else:
+        where = ""
+        if category:
+            where = "WHERE category = :category"
+            params["category"] = category
+        query = text(f"""
+            SELECT {_OUTPUT_COLUMNS}
+            FROM report_hotspots
+            {where}
+            ORDER BY report_count DESC
+            LIMIT :limit
+        """)
+        refreshed_at = (await db.execute(
+            text("SELECT refreshed_at FROM hotspot_refresh_state WHERE id = 1")
+        )).scalar()
+
+    result = await db.execute(query, params)
+    return {
+        "hotspots": [_hotspot(row) for row in result],
+        "params": {"eps_m": eps_m, "min_points": min_points, "window_days": window_days},
+        "source": "live" if live else "precomputed",
+        "refreshed_at": refreshed_at,
+    }
+
+async def refresh_hotspots(db: AsyncSession, force_full: bool = False) -> dict:
+    """
+    Recluster categories that gained or changed reports since the last run
+    (or everything, periodically and when the parameters change). Commits.
+    """
+    locked = (await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": HOTSPOT_LOCK_KEY})).scalar()
+    if not locked:
+        return {"skipped": True}
+
+    state = (await db.execute(text("""
+        SELECT refreshed_at, full_refreshed_at, params,
+               full_refreshed_at < NOW() - CAST(:hours AS DOUBLE PRECISION) * INTERVAL '1 hour' AS full_due
+        FROM hotspot_refresh_state WHERE id = 1
+    """), {"hours": HOTSPOT_FULL_REFRESH_HOURS})).first()
+
+    full = force_full or state is None or state.params != _signature() or state.full_due
+    categories: Optional[List[str]] = None
+    if not full:
+        result = await db.execute(text("""
+            SELECT DISTINCT category FROM reports
+            WHERE created_at > :since OR updated_at > :since
+        """), {"since": state.refreshed_at})
+        categories = [row.category for row in result]
+        if not categories:
+            await db.rollback()
+            return {"skipped": False, "full": False, "categories": []}
+
+    params = _params(HOTSPOT_EPS_M, HOTSPOT_MIN_POINTS, HOTSPOT_WINDOW_DAYS)
+    category_filter = ""
+    if categories is not None:
+        category_filter = " AND category = ANY(:categories)"
+        params["categories"] = categories
+        await db.execute(text("DELETE FROM report_hotspots WHERE category = ANY(:categories)"), params)
+    else:
+        await db.execute(text("DELETE FROM report_hotspots"))
+
+    await db.execute(text(f"""
+        INSERT INTO report_hotspots (
+            category, cluster_id, report_count, recent_count, previous_count,
+            centroid, bounds, first_reported_at, last_reported_at, refreshed_at
+        )
+        SELECT category, cluster_id, report_count, recent_count, previous_count,
+               centroid, bounds, first_reported_at, last_reported_at, NOW()
+        FROM ({_cluster_sql(category_filter)}) AS hotspots
+    """), params)
+
+    # The margin covers reports whose transactions started before this one but committed after it
+    await db.execute(text("""
+        INSERT INTO hotspot_refresh_state (id, refreshed_at, full_refreshed_at, params)
+        VALUES (1, NOW() - INTERVAL '1 minute', NOW(), :params)
+        ON CONFLICT (id) DO UPDATE SET
+            refreshed_at = EXCLUDED.refreshed_at,
+            full_refreshed_at = CASE WHEN :full THEN EXCLUDED.full_refreshed_at
+                                     ELSE hotspot_refresh_state.full_refreshed_at END,
+            params = EXCLUDED.params
+    """), {"params": _signature(), "full": full})
+    await db.commit()
+    await response_cache.invalidate(ANALYTICS_SCOPE)
+    return {"skipped": False, "full": full, "categories": categories}
+
+async def _run_refresher():
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await refresh_hotspots(db)
+        except Exception as e:
+            print(f"Hotspot refresh failed: {e}")
+        await asyncio.sleep(HOTSPOT_REFRESH_SECONDS)
+
+def start_refresher():
+    global _refresher
+    if HOTSPOT_REFRESH_SECONDS > 0 and _refresher is None:
+        _refresher = asyncio.create_task(_run_refresher())
+
+async def stop_refresher():
+    global _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        await asyncio.gather(_refresher, return_exceptions=True)
+        _refresher = None
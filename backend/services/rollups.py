@@ -0,0 +1,131 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+# Every change is counted in both hourly and daily buckets
+GRANULARITIES = ("hour", "day")
+# Dimensions describing what was reported, bucketed by the report's created_at
+REPORT_DIMENSIONS = ("category", "severity", "department", "geohash")
+# Net flow into each status, bucketed by when the transition happened.
+# Summed over all buckets it gives the current number of reports per status.
+STATUS_DIMENSION = "status"
+DIMENSIONS = REPORT_DIMENSIONS + (STATUS_DIMENSION,)
+
+GEOHASH_PRECISION = 5  # ~5 km cells
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Same cells as PostGIS ST_GeoHash(location, precision)."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+def report_dimensions(report) -> Dict[str, object]:
+    """
+    A report's current category, severity and department. Creation and
+    enrichment both read them this way, so the -1 side of a change always
+    lands on the value that was counted.
+    """
+    return {"category": report.category, "severity": report.severity, "department": report.department_id}
+
+def _dimension_value(value) -> str:
+    if value is None:
+        return "none"
+    return getattr(value, "value", str(value))
+
+_UPSERT = text("""
+    INSERT INTO report_rollups (granularity, bucket_start, dimension, value, count)
+    SELECT g.granularity, date_trunc(g.granularity, COALESCE(CAST(:ts AS TIMESTAMPTZ), NOW())),
+           d.dimension, d.value, d.delta
+    FROM unnest(CAST(:granularities AS TEXT[])) AS g(granularity),
+         unnest(CAST(:dimensions AS TEXT[]), CAST(:dimension_values AS TEXT[]), CAST(:deltas AS INTEGER[]))
+             AS d(dimension, value, delta)
+    ON CONFLICT (granularity, bucket_start, dimension, value)
+    DO UPDATE SET count = report_rollups.count + EXCLUDED.count
+""")
+
+async def _apply(db: AsyncSession, ts: Optional[datetime], changes: List[tuple]):
+    """changes: (dimension, value, delta) triples, all in the bucket containing ts (NOW() if None)."""
+    changes = [c for c in changes if c[2] != 0]
+    if not changes:
+        return
+    await db.execute(_UPSERT, {
+        "ts": ts,
+        "granularities": list(GRANULARITIES),
+        "dimensions": [c[0] for c in changes],
+        "dimension_values": [_dimension_value(c[1]) for c in changes],
+        "deltas": [c[2] for c in changes],
+    })
+
+async def record_report_created(db: AsyncSession, dimensions: Dict[str, object], status):
+    """Count a new report. Runs in the caller's transaction."""
+    changes = [(name, dimensions.get(name), 1) for name in REPORT_DIMENSIONS]
+    changes.append((STATUS_DIMENSION, status, 1))
+    await _apply(db, None, changes)
+
+async def record_report_changed(db: AsyncSession, created_at: datetime,
+                                before: Dict[str, object], after: Dict[str, object]):
+    """Move a report's counts when enrichment changes its category, severity or department."""
+    changes = []
+    for name in REPORT_DIMENSIONS:
+        if name in after and _dimension_value(before.get(name)) != _dimension_value(after[name]):
+            changes.append((name, before.get(name), -1))
+            changes.append((name, after[name], 1))
+    await _apply(db, created_at, changes)
+
+async def record_status_change(db: AsyncSession, old_status, new_status):
+    if _dimension_value(old_status) != _dimension_value(new_status):
+        await _apply(db, None, [(STATUS_DIMENSION, old_status, -1), (STATUS_DIMENSION, new_status, 1)])
+
+async def get_time_series(
+    db: AsyncSession,
+    dimension: str,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    value: Optional[str] = None,
+) -> List[dict]:
+    query = """
+        SELECT bucket_start, value, count
+        FROM report_rollups
+        WHERE granularity = :granularity AND dimension = :dimension
+          AND bucket_start >= date_trunc(:granularity, CAST(:start AS TIMESTAMPTZ))
+          AND bucket_start < :end
+    """
+    params = {"granularity": granularity, "dimension": dimension, "start": start, "end": end}
+    if value is not None:
+        query += " AND value = :value"
+        params["value"] = value
+    query += " ORDER BY bucket_start, value"
+
+    result = await db.execute(text(query), params)
+    return [{"bucket_start": row.bucket_start, "value": row.value, "count": row.count} for row in result]
+
+async def get_totals(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """All-time totals per dimension value, from daily buckets only."""
+    result = await db.execute(text("""
+        SELECT dimension, value, SUM(count) AS total
+        FROM report_rollups
+        WHERE granularity = 'day'
+        GROUP BY dimension, value
+    """))
+    totals: Dict[str, Dict[str, int]] = {name: {} for name in DIMENSIONS}
+    for row in result:
+        if row.total:
+            totals.setdefault(row.dimension, {})[row.value] = int(row.total)
+    return totals
@@ -0,0 +1,148 @@
+import asyncio
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import os
+from database import AsyncSessionLocal
+from models import ReportStatusEvent
+from utils.response_cache import response_cache, ANALYTICS_SCOPE
+
+# Percentiles cover status intervals that ended within this many days
+SLA_WINDOW_DAYS = int(os.getenv("SLA_WINDOW_DAYS", 90))
+SLA_REFRESH_SECONDS = float(os.getenv("SLA_REFRESH_SECONDS", 300))
+
+# pg advisory lock key so only one worker refreshes at a time
+SLA_LOCK_KEY = 716_002
+
+_refresher: Optional[asyncio.Task] = None
+
+async def record_transition(db: AsyncSession, report_id: int, from_status, to_status, changed_by: Optional[int] = None):
+    """Append a status event in the caller's transaction."""
+    db.add(ReportStatusEvent(
+        report_id=report_id, from_status=from_status, to_status=to_status, changed_by=changed_by
+    ))
+
+# Each event opens an interval that the report's next event closes; only
+# closed intervals are timed. time_to_resolve runs from the first event to
+# the first move into `resolved`. Department and team come from the report's
+# current assignment.
+_REFRESH_SQL = text("""
+    WITH recent AS (
+        SELECT DISTINCT report_id FROM report_status_events
+        WHERE created_at > NOW() - make_interval(days => CAST(:window_days AS INTEGER))
+    ),
+    history AS (
+        SELECT e.report_id, CAST(e.to_status AS TEXT) AS status, e.created_at AS entered_at,
+               LEAD(e.created_at) OVER (PARTITION BY e.report_id ORDER BY e.created_at, e.id) AS left_at
+        FROM report_status_events e
+        JOIN recent USING (report_id)
+    ),
+    samples AS (
+        SELECT report_id, status AS metric, EXTRACT(EPOCH FROM left_at - entered_at) AS seconds
+        FROM history
+        WHERE left_at > NOW() - make_interval(days => CAST(:window_days AS INTEGER))
+        UNION ALL
+        SELECT report_id, 'time_to_resolve',
+               EXTRACT(EPOCH FROM MIN(entered_at) FILTER (WHERE status = 'resolved') - MIN(entered_at))
+        FROM history
+        GROUP BY report_id
+        HAVING MIN(entered_at) FILTER (WHERE status = 'resolved')
+               > NOW() - make_interval(days => CAST(:window_days AS INTEGER))
+    )
+    INSERT INTO report_sla_stats (
+        scope, scope_id, metric, sample_count, p50_seconds, p90_seconds, p99_seconds, refreshed_at
+    )
+    SELECT
+        CASE GROUPING(r.department_id, r.assigned_team_id)
+            WHEN 1 THEN 'department' WHEN 2 THEN 'team' ELSE 'all' END,
+        CASE GROUPING(r.department_id, r.assigned_team_id)
+            WHEN 1 THEN r.department_id WHEN 2 THEN r.assigned_team_id END,
+        s.metric,
+        COUNT(*),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY s.seconds),
+        percentile_cont(0.9) WITHIN GROUP (ORDER BY s.seconds),
+        percentile_cont(0.99) WITHIN GROUP (ORDER BY s.seconds),
+        NOW()
+    FROM samples s
+    JOIN reports r ON r.id = s.report_id
+    GROUP BY GROUPING SETS (
+        (s.metric, r.department_id),
+        (s.metric, r.assigned_team_id),
+        (s.metric)
+    )
+""")
+
+async def refresh_sla_stats(db: AsyncSession) -> dict:
+    """Recompute report_sla_stats from the status events in the window. Commits."""
+    locked = (await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SLA_LOCK_KEY})).scalar()
+    if not locked:
+        return {"skipped": True}
+
+    await db.execute(text("DELETE FROM report_sla_stats"))
+    result = await db.execute(_REFRESH_SQL, {"window_days": SLA_WINDOW_DAYS})
+    await db.commit()
+    await response_cache.invalidate(ANALYTICS_SCOPE)
+    return {"skipped": False, "rows": result.rowcount}
+
+async def get_sla_stats(
+    db: AsyncSession,
+    department_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+) -> dict:
+    """Precomputed percentiles: city-wide, plus one department and/or team when given."""
+    scopes = ["scope = 'all'"]
+    params = {}
+    if department_id is not None:
+        scopes.append("(scope = 'department' AND scope_id = :department_id)")
+        params["department_id"] = department_id
+    if team_id is not None:
+        scopes.append("(scope = 'team' AND scope_id = :team_id)")
+        params["team_id"] = team_id
+    if department_id is None and team_id is None:
+        scopes.append("scope IN ('department', 'team')")
+
+    result = await db.execute(text(f"""
+        SELECT scope, scope_id, metric, sample_count, p50_seconds, p90_seconds, p99_seconds, refreshed_at
+        FROM report_sla_stats
+        WHERE {" OR ".join(scopes)}
+        ORDER BY scope, scope_id, metric
+    """), params)
+    rows = result.all()
+    stats: List[dict] = [
+        {
+            "scope": row.scope,
+            "scope_id": row.scope_id,
+            "metric": row.metric,
+            "sample_count": row.sample_count,
+            "p50_seconds": row.p50_seconds,
+            "p90_seconds": row.p90_seconds,
+            "p99_seconds": row.p99_seconds,
+        }
+        for row in rows
+    ]
+    return {
+        "window_days": SLA_WINDOW_DAYS,
+        "refreshed_at": max((row.refreshed_at for row in rows), default=None),
+        "stats": stats,
+    }
+
+async def _run_refresher():
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await refresh_sla_stats(db)
+        except Exception as e:
+            print(f"SLA stats refresh failed: {e}")
+        await asyncio.sleep(SLA_REFRESH_SECONDS)
+
+def start_refresher():
+    global _refresher
+    if SLA_REFRESH_SECONDS > 0 and _refresher is None:
+        _refresher = asyncio.create_task(_run_refresher())
+
+async def stop_refresher():
+    global _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        await asyncio.gather(_refresher, return_exceptions=True)
+        _refresher = None
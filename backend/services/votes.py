@@ -0,0 +1,248 @@
+import asyncio
+import random
+from typing import List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+import os
+from database import AsyncSessionLocal
+from utils.response_cache import response_cache, REPORTS_SCOPE, report_scope
+
+# 0 applies vote deltas straight to reports.upvotes. N > 0 spreads them over
+# N shard rows per report (so hot reports don't serialize on one row lock)
+# and folds them into reports.upvotes every VOTE_FLUSH_SECONDS.
+VOTE_COUNTER_SHARDS = int(os.getenv("VOTE_COUNTER_SHARDS", 0))
+VOTE_FLUSH_SECONDS = float(os.getenv("VOTE_FLUSH_SECONDS", 2.0))
+
+_flusher: Optional[asyncio.Task] = None
+
+# prev ... FOR UPDATE locks nothing while the user has no vote row yet, so two
+# concurrent first votes would both see an empty prev and both count. Callers
+# take this per-(user, report) lock first. Under READ COMMITTED the vote
+# statement that follows gets a fresh snapshot, so it sees the earlier vote.
+# Bulk callers pass report ids in ascending order, so concurrent batches lock
+# in the same order.
+_LOCK_VOTES = text("""
+    SELECT pg_advisory_xact_lock(CAST(:user_id AS INTEGER), report_id)
+    FROM unnest(CAST(:report_ids AS INTEGER[])) AS t(report_id)
+""")
+
+# UPDATE ... FROM locks rows in whatever order its join produces, so two
+# users' overlapping batches could deadlock on reports rows. Bulk direct votes
+# take the row locks up front in id order; the UPDATE then finds them held.
+_LOCK_REPORTS = text("""
+    SELECT id FROM reports WHERE id = ANY(CAST(:report_ids AS INTEGER[])) ORDER BY id FOR UPDATE
+""")
+
+# Clicking the same button twice removes the vote, so the new value is either
+# :value or nothing. Only upvotes count towards reports.upvotes.
+_VOTE_CTE = """
+    WITH prev AS (
+        SELECT value FROM votes
+        WHERE user_id = :user_id AND report_id = :report_id
+        FOR UPDATE
+    ),
+    removed AS (
+        DELETE FROM votes
+        WHERE user_id = :user_id AND report_id = :report_id AND value = :value
+        RETURNING value
+    ),
+    upserted AS (
+        INSERT INTO votes (user_id, report_id, value)
+        SELECT :user_id, :report_id, :value
+        WHERE NOT EXISTS (SELECT 1 FROM prev WHERE value = :value)
+          AND EXISTS (SELECT 1 FROM reports WHERE id = :report_id)
+        ON CONFLICT (user_id, report_id) DO UPDATE SET value = EXCLUDED.value
+        RETURNING value
+    ),
+    delta AS (
+        SELECT (SELECT COUNT(*) FROM upserted WHERE value = 1)
+             - (SELECT COUNT(*) FROM prev WHERE value = 1) AS d
+    )
+"""
+
+_DIRECT_VOTE = text(_VOTE_CTE + """,
+    bumped AS (
+        UPDATE reports SET upvotes = GREATEST(0, COALESCE(upvotes, 0) + (SELECT d FROM delta))
+        WHERE id = :report_id AND (SELECT d FROM delta) <> 0
+        RETURNING upvotes
+    )
+    SELECT COALESCE(
+        (SELECT upvotes FROM bumped),
+        (SELECT COALESCE(upvotes, 0) FROM reports WHERE id = :report_id)
+    ) AS upvotes
+""")
+
+_SHARDED_VOTE = text(_VOTE_CTE + """,
+    sharded AS (
+        INSERT INTO vote_counter_shards (report_id, shard, delta)
+        SELECT :report_id, CAST(:shard AS INTEGER), d FROM delta WHERE d <> 0
+        ON CONFLICT (report_id, shard) DO UPDATE
+            SET delta = vote_counter_shards.delta + EXCLUDED.delta
+        RETURNING delta
+    )
+    SELECT
+        (SELECT COALESCE(upvotes, 0) FROM reports WHERE id = :report_id)
+        + (SELECT COALESCE(SUM(delta), 0) FROM vote_counter_shards WHERE report_id = :report_id)
+        + (SELECT d FROM delta) AS upvotes
+""")
+
+_FLUSH_SHARDS = text("""
+    WITH drained AS (
+        DELETE FROM vote_counter_shards RETURNING report_id, delta
+    ),
+    totals AS (
+        SELECT report_id, SUM(delta) AS d FROM drained GROUP BY report_id
+    )
+    UPDATE reports SET upvotes = GREATEST(0, COALESCE(upvotes, 0) + totals.d)
+    FROM totals
+    WHERE reports.id = totals.report_id
+    RETURNING reports.id
+""")
+
+# Bulk votes set the final state (1, -1 or 0 = no vote) per report, so replaying
+# the same batch twice is harmless. Unknown report ids are skipped.
+_BULK_VOTE_CTE = """
+    WITH input AS (
+        SELECT * FROM unnest(CAST(:report_ids AS INTEGER[]), CAST(:vote_values AS INTEGER[]))
+            AS t(report_id, value)
+    ),
+    valid AS (
+        SELECT input.report_id, input.value
+        FROM input JOIN reports ON reports.id = input.report_id
+    ),
+    prev AS (
+        SELECT votes.report_id, votes.value
+        FROM votes JOIN valid ON valid.report_id = votes.report_id
+        WHERE votes.user_id = :user_id
+        FOR UPDATE OF votes
+    ),
+    removed AS (
+        DELETE FROM votes USING valid
+        WHERE votes.user_id = :user_id AND votes.report_id = valid.report_id AND valid.value = 0
+        RETURNING votes.report_id
+    ),
+    upserted AS (
+        INSERT INTO votes (user_id, report_id, value)
+        SELECT :user_id, report_id, value FROM valid WHERE value <> 0
+        ON CONFLICT (user_id, report_id) DO UPDATE SET value = EXCLUDED.value
+        RETURNING report_id
+    ),
+    deltas AS (
+        SELECT valid.report_id,
+               (CASE WHEN valid.value = 1 THEN 1 ELSE 0 END)
+               - (CASE WHEN prev.value = 1 THEN 1 ELSE 0 END) AS d
+        FROM valid LEFT JOIN prev ON prev.report_id = valid.report_id
+    )
+"""
+
+_BULK_DIRECT_VOTE = text(_BULK_VOTE_CTE + """,
+    bumped AS (
+        UPDATE reports SET upvotes = GREATEST(0, COALESCE(reports.upvotes, 0) + deltas.d)
+        FROM deltas
+        WHERE reports.id = deltas.report_id AND deltas.d <> 0
+        RETURNING reports.id, reports.upvotes
+    )
+    SELECT input.report_id, reports.id IS NOT NULL AS found,
+           COALESCE(bumped.upvotes, reports.upvotes, 0) AS upvotes
+    FROM input
+    LEFT JOIN reports ON reports.id = input.report_id
+    LEFT JOIN bumped ON bumped.id = input.report_id
+""")
+
+_BULK_SHARDED_VOTE = text(_BULK_VOTE_CTE + """,
+    sharded AS (
+        INSERT INTO vote_counter_shards (report_id, shard, delta)
+        SELECT report_id, CAST(:shard AS INTEGER), d FROM deltas WHERE d <> 0
+        -- Shard rows are locked in report id order, as in _LOCK_REPORTS
+        ORDER BY report_id
+        ON CONFLICT (report_id, shard) DO UPDATE
+            SET delta = vote_counter_shards.delta + EXCLUDED.delta
+        RETURNING report_id
+    )
+    SELECT input.report_id, reports.id IS NOT NULL AS found,
+           COALESCE(reports.upvotes, 0)
+           + COALESCE((SELECT SUM(delta) FROM vote_counter_shards s WHERE s.report_id = input.report_id), 0)
+           + COALESCE(deltas.d, 0) AS upvotes
+    FROM input
+    LEFT JOIN reports ON reports.id = input.report_id
+    LEFT JOIN deltas ON deltas.report_id = input.report_id
+""")
+
+async def cast_vote(db: AsyncSession, user_id: int, report_id: int, value: int) -> Optional[int]:
+    """
+    Toggle a user's vote in one statement, serialized per (user, report) by an
+    advisory lock. Returns the report's new upvote count, or None if the
+    report doesn't exist. Does not commit.
+    """
+    params = {"user_id": user_id, "report_id": report_id, "value": value}
+    await db.execute(_LOCK_VOTES, {"user_id": user_id, "report_ids": [report_id]})
+    if VOTE_COUNTER_SHARDS > 0:
+        params["shard"] = random.randrange(VOTE_COUNTER_SHARDS)
+        result = await db.execute(_SHARDED_VOTE, params)
+    else:
+        result = await db.execute(_DIRECT_VOTE, params)
+    upvotes = result.scalar()
+    return None if upvotes is None else max(0, upvotes)
+
+async def set_votes(db: AsyncSession, user_id: int, votes: List[Tuple[int, int]]) -> List[dict]:
+    """
+    Apply many (report_id, value) votes for one user in a single statement.
+    Later entries for the same report win. Returns one result per distinct
+    report with its new upvote count. Does not commit.
+    """
+    final = dict(votes)
+    report_ids = sorted(final)
+    params = {
+        "user_id": user_id,
+        "report_ids": report_ids,
+        "vote_values": [final[report_id] for report_id in report_ids],
+    }
+    await db.execute(_LOCK_VOTES, {"user_id": user_id, "report_ids": report_ids})
+    if VOTE_COUNTER_SHARDS > 0:
+        params["shard"] = random.randrange(VOTE_COUNTER_SHARDS)
+        result = await db.execute(_BULK_SHARDED_VOTE, params)
+    else:
+        await db.execute(_LOCK_REPORTS, {"report_ids": report_ids})
+        result = await db.execute(_BULK_DIRECT_VOTE, params)
+
+    return [
+        {
+            "report_id": row.report_id,
+            "value": final[row.report_id],
+            "status": "applied" if row.found else "not_found",
+            "upvotes": max(0, row.upvotes) if row.found else None,
+        }
+        for row in result
+    ]
+
+async def flush_vote_shards() -> int:
+    """Fold pending shard deltas into reports.upvotes. Returns reports updated."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(_FLUSH_SHARDS)
+        report_ids = result.scalars().all()
+        await db.commit()
+    if report_ids:
+        await response_cache.invalidate(REPORTS_SCOPE, *(report_scope(report_id) for report_id in report_ids))
+    return len(report_ids)
+
+async def _run_flusher():
+    while True:
+        await asyncio.sleep(VOTE_FLUSH_SECONDS)
+        try:
+            await flush_vote_shards()
+        except Exception as e:
+            print(f"Vote shard flush failed: {e}")
+
+def start_flusher():
+    global _flusher
+    if VOTE_COUNTER_SHARDS > 0 and _flusher is None:
+        _flusher = asyncio.create_task(_run_flusher())
+
+async def stop_flusher():
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        await asyncio.gather(_flusher, return_exceptions=True)
+        _flusher = None
+        # Don't leave deltas behind on a clean shutdown
+        await flush_vote_shards()
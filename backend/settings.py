@@ -0,0 +1,32 @@
+from typing import Optional
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class DatabaseSettings(BaseSettings):
+    """
+    Connection pool and session settings, read from the environment (or .env).
+    Pool sizes are per worker process: total connections are roughly
+    workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    """
+    model_config = SettingsConfigDict(env_prefix="DB_", env_file=".env", extra="ignore")
+
+    url: str = Field(
+        "postgresql+asyncpg://admin:admin123@db:5432/citizen_ai",
+        validation_alias="DATABASE_URL",
+    )
+    # Optional hot standby for read-only endpoints (listings, map, analytics)
+    replica_url: Optional[str] = Field(None, validation_alias="DATABASE_REPLICA_URL")
+
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # Per-statement server-side limit; 0 disables it
+    statement_timeout_ms: int = 30000
+    # SQLAlchemy's per-connection asyncpg prepared statement cache; set 0 behind pgbouncer
+    prepared_statement_cache_size: int = 100
+    # Log every SQL statement. Development only
+    echo: bool = False
+
+db_settings = DatabaseSettings()
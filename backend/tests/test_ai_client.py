@@ -0,0 +1,112 @@
+"""Circuit breaker states and how AIServiceClient.post reports to it."""
+import asyncio
+import httpx
+import pytest
+from utils import ai_client
+from utils.ai_client import AIServiceClient, AIServiceUnavailable, CircuitBreaker, CircuitOpen
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ai_client.time, "monotonic", clock)
+    return clock
+
+def test_opens_after_threshold_and_rejects_until_reset(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+    clock.now += 10
+    assert not breaker.allow()
+    assert breaker.retry_after() == 20
+    assert breaker.stats()["rejected"] == 2
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # the trial is in flight
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    assert breaker.allow()
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+def test_lost_trial_is_replaced_after_reset_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+def test_released_trial_frees_the_next_call(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.state == "open"
+    assert breaker.allow()
+
+def make_client(handler) -> AIServiceClient:
+    client = AIServiceClient("test", "http://ai")
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    client._client = httpx.AsyncClient(base_url="http://ai", transport=httpx.MockTransport(handler))
+    return client
+
+def test_post_records_success_and_failure():
+    def handler(request):
+        if request.url.path == "/ok":
+            return httpx.Response(200, json={"ok": True})
+        return httpx.Response(503)
+
+    async def body():
+        client = make_client(handler)
+        assert await client.post("/ok", {}) == {"ok": True}
+        with pytest.raises(AIServiceUnavailable):
+            await client.post("/down", {})
+        assert client.breaker.state == "open"
+        with pytest.raises(CircuitOpen) as rejected:
+            await client.post("/ok", {})
+        assert 0 < rejected.value.retry_after <= 30
+        assert set(client.stats()["latency"]) == {"/ok", "/down"}
+        await client.close()
+    asyncio.run(body())
+
+def test_cancelled_call_is_not_a_failure():
+    async def handler(request):
+        await asyncio.sleep(10)
+        return httpx.Response(200, json={})
+
+    async def body():
+        client = make_client(handler)
+        call = asyncio.ensure_future(client.post("/slow", {}))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert client.breaker.state == "closed" and client.breaker.failures == 0
+        await client.close()
+    asyncio.run(body())
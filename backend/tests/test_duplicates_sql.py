@@ -0,0 +1,32 @@
+"""Duplicate search against a real PostGIS/pgvector database."""
+from sqlalchemy import text
+from services.duplicates import find_duplicates_of_report
+
+def vector_sql(last: float) -> str:
+    """A 384-dim vector of ones with the last component set to `last`."""
+    return f"CAST(array_append(array_fill(1.0::real, ARRAY[383]), {last}::real) AS vector)"
+
+def test_finds_nearby_duplicate_among_many_distant_neighbours(run_db):
+    async def body(db):
+        await db.execute(text("TRUNCATE reports CASCADE"))
+        insert = """
+            INSERT INTO reports (title, description, category, status, severity, location,
+                                 embedding, embedding_model, created_at)
+            SELECT 'Pothole', 'Hole in the road', 'pothole', 'pending', 'medium',
+                   ST_SetSRID(ST_MakePoint({lon}, {lat}), 4326), {vector}, 'test-model', NOW()
+            FROM generate_series(1, {n})
+        """
+        await db.execute(text(insert.format(lon=-73.98, lat=40.74, vector=vector_sql(1.0), n=1)))
+        # Thousands of identical reports in another part of town: the whole table's nearest neighbours
+        await db.execute(text(insert.format(lon=-73.90, lat=40.80, vector=vector_sql(1.0), n=3000)))
+        # The real duplicate, 50 m away, with a slightly less similar embedding
+        await db.execute(text(insert.format(lon=-73.9806, lat=40.74, vector=vector_sql(0.5), n=1)))
+        await db.execute(text("ANALYZE reports"))
+        await db.commit()
+
+        target = (await db.execute(text("SELECT min(id) FROM reports"))).scalar()
+        matches = await find_duplicates_of_report(db, target)
+        assert len(matches) == 1
+        assert matches[0]["distance_m"] < 100
+        assert matches[0]["score"] > 0.99
+    run_db(body)
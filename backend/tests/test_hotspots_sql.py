@@ -0,0 +1,39 @@
+"""Hotspot refresh and read queries against a real PostGIS database."""
+from sqlalchemy import text
+from services.hotspots import HOTSPOT_EPS_M, get_hotspots, refresh_hotspots
+
+async def reset(db, points: int):
+    await db.execute(text("TRUNCATE reports, report_hotspots, hotspot_refresh_state CASCADE"))
+    # A tight cluster of potholes, well inside HOTSPOT_EPS_M of each other
+    await db.execute(text("""
+        INSERT INTO reports (title, description, category, status, severity, location, created_at)
+        SELECT 'Pothole', 'Hole in the road', 'pothole', 'pending', 'medium',
+               ST_SetSRID(ST_MakePoint(-73.98 + i * 0.0001, 40.74), 4326), NOW() - i * INTERVAL '1 hour'
+        FROM generate_series(1, :points) AS i
+    """), {"points": points})
+    await db.commit()
+
+def test_full_then_incremental_refresh(run_db):
+    async def body(db):
+        await reset(db, 5)
+        result = await refresh_hotspots(db, force_full=True)
+        assert result["full"] is True
+
+        # Reads hotspot_refresh_state, including the full_due interval arithmetic
+        result = await refresh_hotspots(db)
+        assert result["skipped"] is False
+        assert result["full"] is False
+
+        hotspots = await get_hotspots(db)
+        assert hotspots["source"] == "precomputed"
+        assert [h["category"] for h in hotspots["hotspots"]] == ["pothole"]
+        assert hotspots["hotspots"][0]["report_count"] == 5
+    run_db(body)
+
+def test_live_clustering_with_overridden_params(run_db):
+    async def body(db):
+        await reset(db, 5)
+        hotspots = await get_hotspots(db, category="pothole", eps_m=HOTSPOT_EPS_M * 2)
+        assert hotspots["source"] == "live"
+        assert hotspots["hotspots"][0]["report_count"] == 5
+    run_db(body)
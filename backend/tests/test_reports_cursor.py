@@ -0,0 +1,18 @@
+"""Keyset pagination cursors for GET /reports."""
+from datetime import datetime, timezone
+import pytest
+from fastapi import HTTPException
+from routers.reports import decode_cursor, encode_cursor
+
+def test_round_trip():
+    created_at = datetime(2026, 10, 18, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor) == (created_at, 42)
+    # Safe to pass as a query parameter unescaped
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm9waXBl", encode_cursor(datetime(2026, 1, 1), 1)[:-4] + "eA=="])
+def test_rejects_garbage(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
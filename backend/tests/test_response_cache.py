@@ -0,0 +1,58 @@
+"""ETag matching and scope invalidation in the response cache."""
+import asyncio
+from starlette.requests import Request
+from utils.response_cache import MemoryBackend, ResponseCache, etag_matches, make_etag
+
+def make_request(path: str, query: str = "", if_none_match: str = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(), "headers": headers})
+
+def test_make_etag_is_a_quoted_content_hash():
+    etag = make_etag(b"[]")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag(b"[]") != make_etag(b"[1]")
+
+def test_etag_matches():
+    etag = make_etag(b"body")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches('"other"', etag)
+
+def test_hit_304_and_invalidation():
+    cache = ResponseCache(MemoryBackend(max_items=10, ttl_seconds=60))
+
+    async def body():
+        key, cached = await cache.lookup(make_request("/reports/", "b=2&a=1"), ["reports"])
+        assert cached is None
+        stored = await cache.store(key, make_request("/reports/"), b"[1]", {"X-Next-Cursor": "c"})
+        etag = stored.headers["etag"]
+
+        # Query parameter order doesn't matter
+        _, hit = await cache.lookup(make_request("/reports/", "a=1&b=2"), ["reports"])
+        assert hit.status_code == 200 and hit.body == b"[1]"
+        assert hit.headers["x-next-cursor"] == "c"
+
+        _, not_modified = await cache.lookup(make_request("/reports/", "a=1&b=2", etag), ["reports"])
+        assert not_modified.status_code == 304
+
+        await cache.invalidate("reports")
+        _, after = await cache.lookup(make_request("/reports/", "a=1&b=2"), ["reports"])
+        assert after is None
+    asyncio.run(body())
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["not_modified"], stats["invalidations"]) == (2, 2, 1, 1)
+
+def test_disabled_cache_still_responds():
+    cache = ResponseCache(None)
+
+    async def body():
+        key, cached = await cache.lookup(make_request("/reports/"), ["reports"])
+        assert key is None and cached is None
+        response = await cache.store(key, make_request("/reports/"), b"[]")
+        assert response.status_code == 200 and response.headers["etag"] == make_etag(b"[]")
+    asyncio.run(body())
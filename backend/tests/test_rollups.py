@@ -0,0 +1,60 @@
+"""Rollup deltas from report creation followed by enrichment, and geohash cells, without a database."""
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from models import ReportSeverity, ReportStatus
+from services import rollups
+
+class RecordingSession:
+    """Collects the (dimension, value) -> delta changes sent to report_rollups."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    async def execute(self, statement, params):
+        for dimension, value, delta in zip(params["dimensions"], params["dimension_values"], params["deltas"]):
+            self.counts[(dimension, value)] += delta
+
+def test_create_then_enrich_nets_out():
+    db = RecordingSession()
+    # As create_report sees it after the flush: severity is the column default
+    report = SimpleNamespace(category="pothole", severity=ReportSeverity.medium, department_id=None)
+
+    async def body():
+        dimensions = rollups.report_dimensions(report)
+        dimensions["geohash"] = rollups.geohash_encode(40.74, -73.98)
+        await rollups.record_report_created(db, dimensions, ReportStatus.pending)
+
+        before = rollups.report_dimensions(report)
+        report.category, report.severity, report.department_id = "streetlight", ReportSeverity.high, 3
+        await rollups.record_report_changed(db, datetime.now(timezone.utc), before, rollups.report_dimensions(report))
+    asyncio.run(body())
+
+    assert {key: n for key, n in db.counts.items() if n} == {
+        ("category", "streetlight"): 1,
+        ("severity", "high"): 1,
+        ("department", "3"): 1,
+        ("geohash", rollups.geohash_encode(40.74, -73.98)): 1,
+        ("status", "pending"): 1,
+    }
+
+def test_unchanged_enrichment_writes_nothing():
+    db = RecordingSession()
+    report = SimpleNamespace(category="pothole", severity=ReportSeverity.medium, department_id=2)
+    dimensions = rollups.report_dimensions(report)
+    asyncio.run(rollups.record_report_changed(db, datetime.now(timezone.utc), dimensions, dict(dimensions)))
+    assert not db.counts
+
+@pytest.mark.parametrize("lat, lon, precision, expected", [
+    (57.64911, 10.40744, 11, "u4pruydqqvj"),
+    (40.74, -73.98, 5, "dr5ru"),
+    (-33.8688, 151.2093, 5, "r3gx2"),
+    (0.0, 0.0, 5, "s0000"),
+])
+def test_geohash_encode(lat, lon, precision, expected):
+    assert rollups.geohash_encode(lat, lon, precision) == expected
+
+def test_geohash_default_precision():
+    assert len(rollups.geohash_encode(40.74, -73.98)) == rollups.GEOHASH_PRECISION
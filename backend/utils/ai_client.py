@@ -0,0 +1,185 @@
+import asyncio
+import time
+from typing import Dict, Optional
+import httpx
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AI_DUPLICATE_URL = os.getenv("AI_DUPLICATE_URL", "http://ai-duplicate:9001")
+
+AI_DEFAULT_TIMEOUT = float(os.getenv("AI_DEFAULT_TIMEOUT", 5.0))
+AI_ANALYZE_TIMEOUT = float(os.getenv("AI_ANALYZE_TIMEOUT", 5.0))
+AI_EMBED_TIMEOUT = float(os.getenv("AI_EMBED_TIMEOUT", 3.0))
+AI_MAX_CONNECTIONS = int(os.getenv("AI_MAX_CONNECTIONS", 50))
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", 5))
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", 30.0))
+
+class AIServiceUnavailable(Exception):
+    """Raised when an AI call fails or is short-circuited by the breaker."""
+
+class CircuitOpen(AIServiceUnavailable):
+    """The breaker rejected the call without trying it; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    A trial whose outcome is never recorded is replaced after another
+    `reset_timeout`, so a lost trial cannot keep the breaker half-open forever.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state in ("open", "half_open"):
+            # In half_open, opened_at is when the in-flight trial call started
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self.opened_at = time.monotonic()
+                return True
+            self.rejected += 1
+            return False
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets another trial call through."""
+        if self.state == "closed":
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def release_trial(self):
+        """A half-open trial ended without an outcome (cancelled); let the next call try instead."""
+        if self.state == "half_open":
+            self.state = "open"
+            self.opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+class LatencyHistogram:
+    """Cumulative latency buckets in seconds, Prometheus-style."""
+
+    BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def stats(self) -> dict:
+        buckets = {}
+        cumulative = 0
+        for bound, n in zip(self.BUCKETS, self.counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": self.total, "buckets": buckets}
+
+class AIServiceClient:
+    """
+    Keep-alive connection pool to one AI service, shared by all requests.
+    Started and closed with the app lifecycle.
+    """
+
+    def __init__(self, name: str, base_url: str, timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: float = AI_DEFAULT_TIMEOUT):
+        self.name = name
+        self.base_url = base_url
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.breaker = CircuitBreaker(AI_BREAKER_FAILURES, AI_BREAKER_RESET_SECONDS)
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=AI_MAX_CONNECTIONS,
+                    max_keepalive_connections=AI_MAX_CONNECTIONS,
+                ),
+                timeout=self.default_timeout,
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(self, path: str, payload: dict) -> dict:
+        """POST JSON and return the decoded body, or raise AIServiceUnavailable."""
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name} circuit open", self.breaker.retry_after())
+
+        started = time.perf_counter()
+        try:
+            await self.start()
+            response = await self._client.post(
+                path, json=payload, timeout=self.timeouts.get(path, self.default_timeout)
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            self.breaker.record_failure()
+            raise AIServiceUnavailable(f"{self.name}{path} failed: {e!r}") from e
+        except asyncio.CancelledError:
+            # Says nothing about the service's health, but must not strand a half-open trial
+            self.breaker.release_trial()
+            raise
+        finally:
+            self.latency.setdefault(path, LatencyHistogram()).observe(time.perf_counter() - started)
+
+        self.breaker.record_success()
+        return response.json()
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "latency": {path: h.stats() for path, h in self.latency.items()},
+        }
+
+ai_duplicate = AIServiceClient(
+    "ai-duplicate",
+    AI_DUPLICATE_URL,
+    timeouts={"/analyze": AI_ANALYZE_TIMEOUT, "/embed": AI_EMBED_TIMEOUT},
+)
+
+async def start_clients():
+    await ai_duplicate.start()
+
+async def close_clients():
+    await ai_duplicate.close()
+
+def client_stats() -> dict:
+    return {ai_duplicate.name: ai_duplicate.stats()}
@@ -0,0 +1,194 @@
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import Request, Response
+import os
+from utils.cache import TTLCache
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # optional, only needed for RESPONSE_CACHE_URL=redis://...
+    redis = None
+
+# "" or memory:// keeps entries in this process; redis://host:6379/0 shares them
+# (and their invalidation) across workers; "off" disables caching.
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30))
+RESPONSE_CACHE_MAX_ITEMS = int(os.getenv("RESPONSE_CACHE_MAX_ITEMS", 5000))
+
+KEY_PREFIX = "respcache:"
+
+class MemoryBackend:
+    """In-process LRU. Also the stand-in for Redis when none is available."""
+    name = "memory"
+
+    def __init__(self, max_items: int, ttl_seconds: float):
+        self.entries = TTLCache(max_items=max_items, ttl_seconds=ttl_seconds)
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, entry: dict):
+        self.entries.set(key, entry)
+
+    async def generations(self, scopes: List[str]) -> List[int]:
+        return [self._generations.get(scope, 0) for scope in scopes]
+
+    async def bump(self, scopes: List[str]):
+        for scope in scopes:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    async def close(self):
+        self.entries.clear()
+
+class RedisBackend:
+    """Any server speaking the Redis protocol (Redis, Valkey, KeyDB, ...)."""
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: float):
+        self.client = redis.from_url(url)
+        self.ttl = max(1, int(ttl_seconds))
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(KEY_PREFIX + key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, entry: dict):
+        await self.client.set(KEY_PREFIX + key, json.dumps(entry), ex=self.ttl)
+
+    async def generations(self, scopes: List[str]) -> List[int]:
+        values = await self.client.mget([KEY_PREFIX + "gen:" + scope for scope in scopes])
+        return [int(value or 0) for value in values]
+
+    async def bump(self, scopes: List[str]):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for scope in scopes:
+                pipe.incr(KEY_PREFIX + "gen:" + scope)
+            await pipe.execute()
+
+    async def close(self):
+        await self.client.aclose()
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+class ResponseCache:
+    """
+    Serialized GET responses keyed by path, query string and the generation
+    of each scope they depend on. Invalidating a scope bumps its generation,
+    so every entry built from the old data stops matching and ages out.
+    """
+
+    def __init__(self, backend=None, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled and backend is not None
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def lookup(self, request: Request, scopes: Iterable[str]) -> Tuple[Optional[str], Optional[Response]]:
+        """
+        (key, response). response is a cached 200 or a 304 on a hit; on a miss
+        build the body and pass key to store(). key is None when the cache is off.
+        """
+        if not self.enabled:
+            return None, None
+        scopes = list(scopes)
+        try:
+            generations = await self.backend.generations(scopes)
+            query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+            versions = ",".join(f"{scope}={gen}" for scope, gen in zip(scopes, generations))
+            key = f"{versions}|{request.url.path}?{query}"
+            entry = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            print(f"Response cache lookup failed: {e}")
+            return None, None
+
+        if entry is None:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        return key, self._respond(request, entry)
+
+    async def store(
+        self,
+        key: Optional[str],
+        request: Request,
+        body: bytes,
+        headers: Optional[Dict[str, str]] = None,
+        cache_control: str = "no-cache",
+    ) -> Response:
+        entry = {
+            "body": body.decode(),
+            "etag": make_etag(body),
+            "headers": dict(headers or {}, **{"Cache-Control": cache_control}),
+        }
+        if key is not None:
+            try:
+                await self.backend.set(key, entry)
+            except Exception as e:
+                self.errors += 1
+                print(f"Response cache store failed: {e}")
+        return self._respond(request, entry)
+
+    def _respond(self, request: Request, entry: dict) -> Response:
+        headers = dict(entry["headers"], ETag=entry["etag"])
+        if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+    async def invalidate(self, *scopes: str):
+        """Drop everything cached from these scopes. Never raises."""
+        if not self.enabled or not scopes:
+            return
+        self.invalidations += 1
+        try:
+            await self.backend.bump(list(dict.fromkeys(scopes)))
+        except Exception as e:
+            self.errors += 1
+            print(f"Response cache invalidation failed: {e}")
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.enabled else "off",
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+def make_backend(url: str):
+    if url == "off":
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if redis is not None:
+            return RedisBackend(url, RESPONSE_CACHE_TTL_SECONDS)
+        print("RESPONSE_CACHE_URL points at Redis but the redis package is not installed; using memory")
+    return MemoryBackend(RESPONSE_CACHE_MAX_ITEMS, RESPONSE_CACHE_TTL_SECONDS)
+
+response_cache = ResponseCache(make_backend(RESPONSE_CACHE_URL))
+
+# Scope names shared by the endpoints and the write paths that invalidate them
+REPORTS_SCOPE = "reports"
+ANALYTICS_SCOPE = "analytics"
+
+def report_scope(report_id: int) -> str:
+    return f"report:{report_id}"
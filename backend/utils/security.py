@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import os
@@ -19,6 +21,54 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt is deliberately slow (~100-300 ms) and releases the GIL, so it runs
+# on a bounded thread pool instead of blocking the event loop. Beyond
+# BCRYPT_WORKERS running plus BCRYPT_MAX_QUEUE waiting, calls are rejected.
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", os.cpu_count() or 2))
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", 64))
+
+_hash_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_hash_stats = {"in_flight": 0, "peak_in_flight": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes queued; the caller should retry later."""
+
+async def _run_hasher(fn, *args):
+    if _hash_stats["in_flight"] >= BCRYPT_WORKERS + BCRYPT_MAX_QUEUE:
+        _hash_stats["rejected"] += 1
+        raise PasswordHasherBusy()
+
+    _hash_stats["in_flight"] += 1
+    _hash_stats["peak_in_flight"] = max(_hash_stats["peak_in_flight"], _hash_stats["in_flight"])
+    loop = asyncio.get_running_loop()
+    future = _hash_executor.submit(fn, *args)
+    # A cancelled caller (e.g. a disconnected client) doesn't stop a running
+    # hash, so the slot is only released once the thread is done with it.
+    # The callback runs on the worker thread; the stats belong to the loop.
+    future.add_done_callback(lambda f: loop.call_soon_threadsafe(_hasher_done, f))
+    return await asyncio.wrap_future(future)
+
+def _hasher_done(future):
+    _hash_stats["in_flight"] -= 1
+    if future.cancelled() or future.exception() is not None:
+        _hash_stats["failed"] += 1
+    else:
+        _hash_stats["completed"] += 1
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    return await _run_hasher(get_password_hash, password)
+
+def password_hasher_stats() -> dict:
+    return {
+        **_hash_stats,
+        "workers": BCRYPT_WORKERS,
+        "max_queue": BCRYPT_MAX_QUEUE,
+        "queue_depth": max(0, _hash_stats["in_flight"] - BCRYPT_WORKERS),
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -3,16 +3,20 @@ import api from '../api';
 
 function ReportList() {
     const [reports, setReports] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+
+    // Without a cursor this loads the first page; with one it appends the next page
+    const fetchReports = async (cursor = null) => {
+        try {
+            const response = await api.get('/reports/', { params: cursor ? { cursor } : {} });
+            setReports(prev => (cursor ? [...prev, ...response.data] : response.data));
+            setNextCursor(response.headers['x-next-cursor'] || null);
+        } catch (error) {
+            console.error('Error fetching reports:', error);
+        }
+    };
 
     useEffect(() => {
-        const fetchReports = async () => {
-            try {
-                const response = await api.get('/reports/');
-                setReports(response.data);
-            } catch (error) {
-                console.error('Error fetching reports:', error);
-            }
-        };
         fetchReports();
     }, []);
 
@@ -33,6 +37,16 @@ function ReportList() {
                     </div>
                 ))}
             </div>
+            {nextCursor && (
+                <div className="text-center mt-4">
+                    <button
+                        className="bg-blue-500 text-white px-4 py-2 rounded"
+                        onClick={() => fetchReports(nextCursor)}
+                    >
+                        Load more
+                    </button>
+                </div>
+            )}
         </div>
     );
 }
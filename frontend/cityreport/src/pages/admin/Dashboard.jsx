@@ -1,8 +1,9 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { BarChart, Bar, PieChart, Pie, Cell, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { TrendingUp, Users, FileText, CheckCircle2 } from 'lucide-react';
 import Navbar from '../../components/shared/Navbar';
 import Card from '../../components/shared/Card';
+import api from '../../api';
 import './AdminDashboard.css';
 
 const CATEGORY_DATA = [
@@ -25,11 +26,40 @@ const MONTHLY_DATA = [
 const COLORS = ['#0F766E', '#F59E0B', '#EF4444', '#3B82F6', '#10B981'];
 
 const AdminDashboard = () => {
-    const stats = {
+    const [stats, setStats] = useState({
         totalReports: 542,
         activeUsers: 1248,
         resolvedReports: 428,
         resolutionRate: 79
+    });
+    const [categoryData, setCategoryData] = useState(CATEGORY_DATA);
+
+    useEffect(() => {
+        fetchSummary();
+    }, []);
+
+    // Totals come from the backend's pre-aggregated rollups
+    const fetchSummary = async () => {
+        try {
+            const response = await api.get('/analytics/summary');
+            const summary = response.data;
+            setStats((prev) => ({
+                ...prev,
+                totalReports: summary.total_reports,
+                resolvedReports: summary.resolved_reports,
+                resolutionRate: summary.total_reports
+                    ? Math.round((summary.resolved_reports / summary.total_reports) * 100)
+                    : 0
+            }));
+            const categories = Object.entries(summary.totals.category || {})
+                .map(([name, value]) => ({ name, value }))
+                .sort((a, b) => b.value - a.value);
+            if (categories.length) {
+                setCategoryData(categories);
+            }
+        } catch (err) {
+            console.error('Error fetching analytics summary:', err);
+        }
     };
 
     return (
@@ -102,7 +132,7 @@ const AdminDashboard = () => {
                         <ResponsiveContainer width="100%" height={300}>
                             <PieChart>
                                 <Pie
-                                    data={CATEGORY_DATA}
+                                    data={categoryData}
                                     cx="50%"
                                     cy="50%"
                                     labelLine={false}
@@ -111,7 +141,7 @@ const AdminDashboard = () => {
                                     fill="#8884d8"
                                     dataKey="value"
                                 >
-                                    {CATEGORY_DATA.map((entry, index) => (
+                                    {categoryData.map((entry, index) => (
                                         <Cell key={`cell-${index}`} fill={COLORS[index % COLORS.length]} />
                                     ))}
                                 </Pie>
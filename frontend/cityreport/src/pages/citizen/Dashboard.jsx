@@ -12,6 +12,8 @@ const CitizenDashboard = () => {
     const navigate = useNavigate();
     const [reports, setReports] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [nextCursor, setNextCursor] = useState(null);
     const [error, setError] = useState('');
     const [searchTerm, setSearchTerm] = useState('');
     const [filters, setFilters] = useState({ category: '', status: '' });
@@ -25,6 +27,7 @@ const CitizenDashboard = () => {
             setLoading(true);
             const response = await api.get('/reports/');
             setReports(response.data);
+            setNextCursor(response.headers['x-next-cursor'] || null);
             setError('');
         } catch (err) {
             console.error('Error fetching reports:', err);
@@ -34,6 +37,19 @@ const CitizenDashboard = () => {
         }
     };
 
+    const loadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const response = await api.get('/reports/', { params: { cursor: nextCursor } });
+            setReports(prev => [...prev, ...response.data]);
+            setNextCursor(response.headers['x-next-cursor'] || null);
+        } catch (err) {
+            console.error('Error loading more reports:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleSearch = (term) => {
         setSearchTerm(term);
         // Implement search logic here
@@ -129,6 +145,15 @@ const CitizenDashboard = () => {
                         )}
                     </div>
                 )}
+
+                {/* Next page, via the X-Next-Cursor header */}
+                {!loading && !error && nextCursor && (
+                    <div className="text-center py-lg">
+                        <Button variant="secondary" onClick={loadMore} disabled={loadingMore}>
+                            {loadingMore ? 'Loading...' : 'Load more'}
+                        </Button>
+                    </div>
+                )}
             </main>
         </div>
     );
@@ -1,9 +1,10 @@
-import React, { useState } from 'react';
-import { MapContainer, TileLayer, Marker, Popup } from 'react-leaflet';
+import React, { useState, useEffect, useCallback } from 'react';
+import { MapContainer, TileLayer, Marker, Popup, CircleMarker, Tooltip, useMapEvents } from 'react-leaflet';
 import { useNavigate } from 'react-router-dom';
 import Navbar from '../../components/shared/Navbar';
 import Badge from '../../components/shared/Badge';
 import Button from '../../components/shared/Button';
+import api from '../../api';
 import 'leaflet/dist/leaflet.css';
 import './MapView.css';
 
@@ -21,32 +22,66 @@ let DefaultIcon = L.icon({
 
 L.Marker.prototype.options.icon = DefaultIcon;
 
-// Mock data
-const MOCK_REPORTS = [
-    { id: 1, title: 'Pothole on Main Street', category: 'Roads', status: 'Pending', position: [40.7128, -74.0060] },
-    { id: 2, title: 'Street Light Not Working', category: 'Electricity', status: 'In Progress', position: [40.7138, -74.0070] },
-    { id: 3, title: 'Garbage Pileup', category: 'Sanitation', status: 'Resolved', position: [40.7118, -74.0050] },
-    { id: 4, title: 'Broken Water Pipe', category: 'Water', status: 'Pending', position: [40.7148, -74.0080] }
-];
+// Reports the map for the current viewport whenever it is panned or zoomed
+const ViewportWatcher = ({ onChange }) => {
+    const map = useMapEvents({
+        moveend: () => onChange(map),
+        zoomend: () => onChange(map),
+    });
+
+    useEffect(() => {
+        onChange(map);
+    }, [map, onChange]);
+
+    return null;
+};
 
 const MapView = () => {
     const navigate = useNavigate();
     const [selectedCategory, setSelectedCategory] = useState('');
+    const [viewport, setViewport] = useState(null);
+    const [clusters, setClusters] = useState([]);
+    const [points, setPoints] = useState([]);
     const center = [40.7128, -74.0060]; // NYC coordinates
 
+    const handleViewportChange = useCallback((map) => {
+        const bounds = map.getBounds();
+        setViewport({
+            min_lon: Math.max(bounds.getWest(), -180),
+            min_lat: Math.max(bounds.getSouth(), -90),
+            max_lon: Math.min(bounds.getEast(), 180),
+            max_lat: Math.min(bounds.getNorth(), 90),
+            zoom: map.getZoom(),
+        });
+    }, []);
+
+    // Server clusters at low zoom, individual points when zoomed in
+    useEffect(() => {
+        if (!viewport) return;
+        const params = { ...viewport };
+        if (selectedCategory) params.category = selectedCategory;
+
+        let cancelled = false;
+        api.get('/map/clusters', { params })
+            .then((response) => {
+                if (cancelled) return;
+                setClusters(response.data.clusters);
+                setPoints(response.data.points);
+            })
+            .catch((err) => console.error('Error fetching map data:', err));
+
+        return () => { cancelled = true; };
+    }, [viewport, selectedCategory]);
+
     const getStatusVariant = (status) => {
         switch (status.toLowerCase()) {
             case 'resolved': return 'success';
-            case 'in progress': return 'warning';
+            case 'in_progress': return 'warning';
             case 'pending': return 'danger';
             default: return 'neutral';
         }
     };
 
-    const filteredReports = selectedCategory
-        ? MOCK_REPORTS.filter(r => r.category === selectedCategory)
-        : MOCK_REPORTS;
-
     return (
         <div className="min-h-screen bg-background">
             <Navbar />
@@ -62,15 +97,20 @@ const MapView = () => {
                             onChange={(e) => setSelectedCategory(e.target.value)}
                         >
                             <option value="">All Categories</option>
-                            <option value="Roads">Roads</option>
-                            <option value="Sanitation">Sanitation</option>
-                            <option value="Electricity">Electricity</option>
-                            <option value="Water">Water</option>
+                            <option value="pothole">Pothole</option>
+                            <option value="garbage">Garbage</option>
+                            <option value="street_light">Street Light</option>
+                            <option value="flooding">Flooding</option>
+                            <option value="graffiti">Graffiti</option>
                         </select>
                     </div>
 
+                    {points.length === 0 && clusters.length > 0 && (
+                        <p className="text-sm text-muted mb-md">Zoom in to see individual reports.</p>
+                    )}
+
                     <div className="reports-list">
-                        {filteredReports.map(report => (
+                        {points.map(report => (
                             <div
                                 key={report.id}
                                 className="report-list-item"
@@ -98,8 +138,18 @@ const MapView = () => {
                             attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
                             url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
                         />
-                        {filteredReports.map(report => (
-                            <Marker key={report.id} position={report.position}>
+                        <ViewportWatcher onChange={handleViewportChange} />
+                        {clusters.map(cluster => (
+                            <CircleMarker
+                                key={`${cluster.lat},${cluster.lon}`}
+                                center={[cluster.lat, cluster.lon]}
+                                radius={Math.min(10 + Math.log2(cluster.count) * 3, 40)}
+                            >
+                                <Tooltip direction="center" permanent>{cluster.count}</Tooltip>
+                            </CircleMarker>
+                        ))}
+                        {points.map(report => (
+                            <Marker key={report.id} position={[report.lat, report.lon]}>
                                 <Popup>
                                     <div className="map-popup">
                                         <h3 className="font-semibold mb-xs">{report.title}</h3>
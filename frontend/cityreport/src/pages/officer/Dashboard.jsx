@@ -1,10 +1,11 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Clock, CheckCircle, AlertCircle } from 'lucide-react';
 import Navbar from '../../components/shared/Navbar';
 import Card from '../../components/shared/Card';
 import Badge from '../../components/shared/Badge';
 import Button from '../../components/shared/Button';
+import api from '../../api';
 import './OfficerDashboard.css';
 
 const MOCK_REPORTS = [
@@ -17,6 +18,28 @@ const MOCK_REPORTS = [
 const OfficerDashboard = () => {
     const navigate = useNavigate();
     const [filter, setFilter] = useState('all');
+    const [slaStats, setSlaStats] = useState([]);
+
+    useEffect(() => {
+        fetchSlaStats();
+    }, []);
+
+    // Percentiles are precomputed server-side from the status history
+    const fetchSlaStats = async () => {
+        try {
+            const response = await api.get('/analytics/sla');
+            setSlaStats(response.data.stats.filter(s => s.scope === 'all'));
+        } catch (err) {
+            console.error('Error fetching SLA stats:', err);
+        }
+    };
+
+    const formatDuration = (seconds) => {
+        if (seconds == null) return '-';
+        if (seconds < 3600) return `${Math.round(seconds / 60)}m`;
+        if (seconds < 86400) return `${(seconds / 3600).toFixed(1)}h`;
+        return `${(seconds / 86400).toFixed(1)}d`;
+    };
 
     const stats = {
         pending: MOCK_REPORTS.filter(r => r.status === 'Pending').length,
@@ -157,6 +180,36 @@ const OfficerDashboard = () => {
                         </table>
                     </div>
                 </Card>
+
+                {slaStats.length > 0 && (
+                    <Card className="mt-lg">
+                        <h2 className="text-xl mb-md">Time in Status</h2>
+                        <div className="reports-table-container">
+                            <table className="reports-table">
+                                <thead>
+                                    <tr>
+                                        <th>Status</th>
+                                        <th>p50</th>
+                                        <th>p90</th>
+                                        <th>p99</th>
+                                        <th>Reports</th>
+                                    </tr>
+                                </thead>
+                                <tbody>
+                                    {slaStats.map(stat => (
+                                        <tr key={stat.metric}>
+                                            <td className="font-semibold">{stat.metric.replace(/_/g, ' ')}</td>
+                                            <td>{formatDuration(stat.p50_seconds)}</td>
+                                            <td>{formatDuration(stat.p90_seconds)}</td>
+                                            <td>{formatDuration(stat.p99_seconds)}</td>
+                                            <td>{stat.sample_count}</td>
+                                        </tr>
+                                    ))}
+                                </tbody>
+                            </table>
+                        </div>
+                    </Card>
+                )}
             </main>
         </div>
     );